@@ -1 +1,2 @@
 name = 'gatekeeper'
+default_app_config = 'gatekeeper.apps.GatekeeperConfig'
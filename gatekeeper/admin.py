@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.safestring import mark_safe
 import pytz
 from datetime import datetime
+from .purge import batched_purges
 from .utils import get_appropriate_object_from_model
 
 def is_in_the_future(dt):
@@ -60,35 +61,40 @@ class GatekeeperGenericAdmin(admin.ModelAdmin):
     ### Control functions
     # These five operations are added to the admin listing page 
     def gatekeeper_set_to_default(self, request, queryset):
-        for item in queryset:
-            item.publish_status = 0
-            item.live_as_of = None
-            item.save()
+        with batched_purges():
+            for item in queryset:
+                item.publish_status = 0
+                item.live_as_of = None
+                item.save()
     gatekeeper_set_to_default.short_description = 'Revert to Preview/Pending status.'
     
     def gatekeeper_permanently_online(self, request, queryset):
-        for item in queryset:
-            item.publish_status = 1
-            item.save()
+        with batched_purges():
+            for item in queryset:
+                item.publish_status = 1
+                item.save()
     gatekeeper_permanently_online.short_description = 'Take item PERMANTENTLY LIVE'
     
     def gatekeeper_conditionally_online(self, request, queryset):
-        for item in queryset:
-            item.publish_status = 0
-            item.save() 
+        with batched_purges():
+            for item in queryset:
+                item.publish_status = 0
+                item.save() 
     gatekeeper_conditionally_online.short_description = 'CONDITIONALLY Online using live_as_of Date'
            
     def gatekeeper_take_online_now(self, request, queryset):
-        for item in queryset:
-            item.publish_status = 0
-            item.live_as_of = datetime.now(pytz.utc)
-            item.save()
+        with batched_purges():
+            for item in queryset:
+                item.publish_status = 0
+                item.live_as_of = datetime.now(pytz.utc)
+                item.save()
     gatekeeper_take_online_now.short_description = 'Take Live as of Right Now'
     
     def gatekeeper_take_offline(self, request, queryset):
-        for item in queryset:
-            item.publish_status = -1
-            item.save() 
+        with batched_purges():
+            for item in queryset:
+                item.publish_status = -1
+                item.save() 
     gatekeeper_take_offline.short_description = 'Take item COMPLETELY OFFLINE'
     
     #class Meta:
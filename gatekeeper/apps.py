@@ -0,0 +1,30 @@
+from django.apps import AppConfig
+from django.db.models.signals import class_prepared
+
+
+class GatekeeperConfig(AppConfig):
+    name = 'gatekeeper'
+    verbose_name = 'Gatekeeper'
+
+    def ready(self):
+        """
+        Registers every gatekeeper model (see registry.py) and connects the receivers that keep the
+        gatekeeper caches honest.   Models that are defined after this (which really only happens in tests)
+        are picked up as they're created.
+        """
+        for model in self.apps.get_models():
+            register_gatekeeper_model(model)
+        class_prepared.connect(register_gatekeeper_model_on_class_prepared, dispatch_uid='gatekeeper:registry')
+
+def register_gatekeeper_model(model):
+    from .models import GatekeeperAbstractModel
+    from .registry import register_model
+    from .signals import connect_gatekeeper_signals
+
+    if not issubclass(model, GatekeeperAbstractModel):
+        return
+    register_model(model)
+    connect_gatekeeper_signals(model)
+
+def register_gatekeeper_model_on_class_prepared(sender, **kwargs):
+    register_gatekeeper_model(sender)
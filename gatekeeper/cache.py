@@ -0,0 +1,172 @@
+import hashlib
+import pytz
+import threading
+import time
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import six
+
+"""
+Caching helpers for gatekeeper models.
+
+The problem with caching anything that went through the gatekeeper is that "live" depends on the clock:
+a cached list of articles is only correct until the next live_as_of date comes around, or until someone
+saves an object in the Admin.   So everything here is built on two things:
+
+    1. A per-model version number kept in the cache.   It is bumped every time an instance of the model is
+        saved or deleted (see signals.py), and it's part of every cache key --- so bumping it "invalidates"
+        every cached entry for that model at once.
+    2. The next scheduled transition for the model (the earliest live_as_of in the future for an object with
+        publish_status = 0).   Cached entries are given a timeout that ends right then, so nothing ever
+        shows up early or late.
+
+gatekeeper_version() is the public face of (1), for your own caches.
+
+Settings:
+    GATEKEEPER_CACHE: the alias of the cache to use (default: 'default')
+    GATEKEEPER_CACHE_TIMEOUT: the longest (in seconds) any entry is kept if there's no transition coming up
+        (default: 3600)
+"""
+
+VERSION_KEY = 'gatekeeper:version:%s'
+
+# The highest version this process has seen for each model label (see _initial_version()).
+_seen_versions = {}
+_seen_lock = threading.Lock()
+
+
+def get_gatekeeper_cache():
+    return caches[getattr(settings, 'GATEKEEPER_CACHE', 'default')]
+
+def get_default_timeout():
+    return getattr(settings, 'GATEKEEPER_CACHE_TIMEOUT', 3600)
+
+def get_model(model_or_label):
+    """
+    Accepts either a model class or an 'app_label.ModelName' string.
+    """
+    if isinstance(model_or_label, six.string_types):
+        return apps.get_model(model_or_label)
+    return model_or_label
+
+def get_model_label(model):
+    return model._meta.label_lower
+
+def _initial_version(label):
+    """
+    What a missing version key starts (again) from:  the current time in milliseconds, or one more than the
+    highest version this process has seen, whichever is higher.   If an evicted key started again from 1, it
+    would soon count back up to a version that something still remembers (e.g., the in-memory timeline), which
+    would then be mistaken for the current one.
+    """
+    return max(int(time.time() * 1000), _seen_versions.get(label, 0) + 1)
+
+def _checked_version(cache, key, label, version):
+    """
+    Makes sure this process never sees the model's version go down:  if another process re-seeded an evicted key
+    lower than what this one has already seen, it's moved up past it (with incr(), so concurrent bumps still
+    count).
+    """
+    seen = _seen_versions.get(label, 0)
+    if version < seen:
+        try:
+            version = cache.incr(key, seen + 1 - version)
+        except ValueError:
+            # Evicted again in the meantime.
+            version = _initial_version(label)
+            cache.add(key, version, None)
+            version = cache.get(key, version)
+    with _seen_lock:
+        if version > _seen_versions.get(label, 0):
+            _seen_versions[label] = version
+    return version
+
+def get_model_version(model):
+    """
+    Returns the current cache version for the model.
+    """
+    cache = get_gatekeeper_cache()
+    label = get_model_label(model)
+    key = VERSION_KEY % label
+    version = cache.get(key)
+    if version is None:
+        initial = _initial_version(label)
+        cache.add(key, initial, None)
+        version = cache.get(key, initial)
+    return _checked_version(cache, key, label, version)
+
+def bump_model_version(model):
+    """
+    Invalidates every cached entry for the model.
+    """
+    cache = get_gatekeeper_cache()
+    label = get_model_label(model)
+    key = VERSION_KEY % label
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # The key isn't there (first save, or the cache was cleared).
+        version = _initial_version(label)
+        cache.set(key, version, None)
+    return _checked_version(cache, key, label, version)
+
+def gatekeeper_version(model):
+    """
+    The model's "gate version": a number that goes up every time anything about the model's gate might have
+    changed (an object saved or deleted, an Admin action, an object going live on schedule).   Put it in your own
+    cache keys and they're invalidated along with everything else for the model:
+
+        key = 'article-feed:%s' % gatekeeper_version(Article)     # or gatekeeper_version('news.Article')
+
+    It only ever goes up:  if the version key is evicted, it starts again from the clock or from past the
+    highest version this process has seen, whichever is higher (and a process that finds it lower than it has
+    seen before moves it up).   So a cached entry whose version is lower than the current one is always stale.
+    """
+    return get_model_version(get_model(model))
+
+def bump_gatekeeper_version(model):
+    """
+    Bumps the model's gate version (one atomic increment).   Saves, deletes and transitions already do this;
+    call it yourself after anything that goes around the signals, like queryset.update().
+    """
+    return bump_model_version(get_model(model))
+
+def get_next_transition(model, now=None):
+    """
+    Returns the earliest future live_as_of date for an object in the model that is waiting to go live,
+    or None if nothing is scheduled.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    return model._default_manager.filter(
+        publish_status=0, live_as_of__gt=now
+    ).order_by('live_as_of').values_list('live_as_of', flat=True).first()
+
+def get_timeout_until_transition(models, now=None):
+    """
+    How long (in seconds) something built from these models can be cached:
+    until the earliest upcoming transition, but never longer than GATEKEEPER_CACHE_TIMEOUT.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    timeout = get_default_timeout()
+    for model in models:
+        transition = get_next_transition(model, now=now)
+        if transition is None:
+            continue
+        seconds = int((transition - now).total_seconds()) + 1
+        if timeout is None or seconds < timeout:
+            timeout = seconds
+    return timeout
+
+def make_gatekeeper_key(prefix, models, *parts):
+    """
+    Builds a cache key that includes the current version of each of the models,
+    so saving any of them makes the key go away.
+    """
+    versions = ['%s.%s' % (get_model_label(m), get_model_version(m)) for m in models]
+    raw = ':'.join([str(p) for p in versions + list(parts)])
+    return 'gatekeeper:%s:%s' % (prefix, hashlib.md5(raw.encode('utf-8')).hexdigest())
@@ -0,0 +1,147 @@
+import pytz
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import six
+
+from .cache import get_model_label
+from .models import GatekeeperChange
+from .utils import GATE_STATE_ALWAYS, GATE_STATE_LIVE, GATE_STATE_SCHEDULED, get_gate_state
+
+"""
+The gatekeeper change log: an append-only record of every object that moved from one publish state to another
+(see utils.py for the five states), for downstream consumers like a search indexer.
+
+The catch with gatekeeping is that most changes don't come from a save:  a scheduled object just goes live
+when its live_as_of comes around, and nothing in the database changes.   So entries are written:
+
+    1. when an object is saved (including through the Admin actions) or deleted, if its state changed;
+    2. when the transition worker (see transitions.py) announces objects that went live (or dark) on schedule
+        --- with effective_at set to when it actually happened.
+
+An indexer remembers the id of the last change it handled, and asks for what came after:
+
+    for change in changes_since(cursor):
+        reindex(change.model, change.object_pk, change.new_state)
+        cursor = change.id
+
+instead of rescanning every table.   It goes through the log in chunks, so memory use doesn't grow with it.
+
+A word of warning about that cursor:  ids are handed out when a row is INSERTed, not when its transaction
+commits.   On databases with concurrent writers (e.g., PostgreSQL), change 1235 can commit (and be read) before
+change 1234 does --- and an indexer whose cursor is already at 1235 will never see 1234.   If that matters, keep
+the cursor a little behind (e.g., re-read the last few hundred ids, or the last minute's worth, each time) and
+skip the changes you've already handled.
+
+Settings:
+    GATEKEEPER_CHANGE_LOG: set to True to keep the log (default: False).   It needs the gatekeeper app's
+        migration: run `migrate gatekeeper`.
+"""
+
+STATE_FIELDS = ('publish_status', 'live_as_of')
+
+def is_change_log_enabled():
+    return getattr(settings, 'GATEKEEPER_CHANGE_LOG', False)
+
+def _get_state(values, now):
+    if values is None:
+        return ''
+    return get_gate_state(values[0], values[1], now=now)
+
+def remember_original_state(sender, instance, **kwargs):
+    """
+    post_init: keep the gate fields as they were loaded, so post_save can tell what changed.
+    (Deferred fields are left alone --- reading them would be a query per object.)
+    """
+    if all(f in instance.__dict__ for f in STATE_FIELDS):
+        instance._gatekeeper_original = tuple(instance.__dict__[f] for f in STATE_FIELDS)
+    else:
+        instance._gatekeeper_original = None
+
+def record_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    now = datetime.now(pytz.utc)
+    old_state = '' if created else _get_state(getattr(instance, '_gatekeeper_original', None), now)
+    current = (instance.publish_status, instance.live_as_of)
+    new_state = _get_state(current, now)
+    instance._gatekeeper_original = current
+    if old_state != new_state:
+        GatekeeperChange.objects.create(
+            model=get_model_label(sender), object_pk=str(instance.pk),
+            old_state=old_state, new_state=new_state, effective_at=now
+        )
+
+def record_deleted(sender, instance, **kwargs):
+    now = datetime.now(pytz.utc)
+    GatekeeperChange.objects.create(
+        model=get_model_label(sender), object_pk=str(instance.pk),
+        old_state=_get_state(getattr(instance, '_gatekeeper_original', None), now), new_state='',
+        effective_at=now
+    )
+
+def get_logged_states(label, pks):
+    """
+    {str(pk): the new_state of the latest change logged for it} for the objects that have one.
+    """
+    logged = GatekeeperChange.objects.filter(model=label, object_pk__in=[str(pk) for pk in pks]).order_by('id')
+    return dict(logged.values_list('object_pk', 'new_state'))
+
+def _get_transition(previous, state, is_live, live_as_of, now):
+    """
+    Returns (old_state, effective_at) for an object that went live (or dark) without being saved.
+    previous is the state last logged for it (or None if there isn't one).
+    """
+    if not is_live:
+        return previous or GATE_STATE_LIVE, now
+    if state == GATE_STATE_LIVE and previous in (None, GATE_STATE_SCHEDULED):
+        # It was scheduled, and went live right on time.
+        return GATE_STATE_SCHEDULED, live_as_of
+    return previous or '', now
+
+def record_transitioned(model, pks, is_live, now=None):
+    """
+    Logs objects that went live (or dark) without being saved.   Objects whose state was already logged
+    (e.g., they were saved with a live_as_of that had already passed) are skipped.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    label = get_model_label(model)
+    logged = get_logged_states(label, pks)
+    changes = []
+    for pk, publish_status, live_as_of in model._default_manager.filter(pk__in=pks).values_list('pk', *STATE_FIELDS):
+        state = get_gate_state(publish_status, live_as_of, now=now)
+        shown = state in (GATE_STATE_ALWAYS, GATE_STATE_LIVE)
+        if shown != is_live or logged.get(str(pk)) == state:
+            # It's been changed again since, or the change was already logged when it was saved.
+            continue
+        old_state, effective_at = _get_transition(logged.get(str(pk)), state, is_live, live_as_of, now)
+        changes.append(GatekeeperChange(
+            model=label, object_pk=str(pk), old_state=old_state, new_state=state, effective_at=effective_at
+        ))
+    GatekeeperChange.objects.bulk_create(changes)
+    return changes
+
+def connect_change_log(model):
+    from django.db.models.signals import post_delete, post_init, post_save
+    uid = 'gatekeeper:changelog:%s' % get_model_label(model)
+    post_init.connect(remember_original_state, sender=model, dispatch_uid=uid)
+    post_save.connect(record_saved, sender=model, dispatch_uid=uid)
+    post_delete.connect(record_deleted, sender=model, dispatch_uid=uid)
+
+def changes_since(cursor=None, models=None, chunk_size=1000):
+    """
+    Yields every GatekeeperChange after the cursor (the id of the last change you've seen, or None for
+    everything), oldest first.   models (model classes or labels) limits it to those models.
+    """
+    qs = GatekeeperChange.objects.order_by('id')
+    if models:
+        qs = qs.filter(model__in=[m.lower() if isinstance(m, six.string_types) else get_model_label(m) for m in models])
+    last_id = int(cursor) if cursor is not None else 0
+    while True:
+        chunk = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        for change in chunk:
+            yield change
+        last_id = chunk[-1].id
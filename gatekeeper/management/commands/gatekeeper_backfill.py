@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...cache import bump_gatekeeper_version, get_model
+from ...registry import get_model_info, get_registered_models
+from ...utils import backfill_effective_live_from
+
+class Command(BaseCommand):
+    help = "Fills in effective_live_from for existing rows (e.g., after adding GatekeeperEffectiveLiveAbstractModel)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+            help='Only backfill these models (default: every model with an effective_live_from column).')
+        parser.add_argument('--batch-size', type=int, default=1000,
+            help='How many rows to update at a time.')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            models = [get_model(label) for label in options['models']]
+            for model in models:
+                info = get_model_info(model)
+                if info is None or not info.effective_live:
+                    raise CommandError('%s has no effective_live_from column.' % model._meta.label)
+        else:
+            models = [m for m in get_registered_models() if get_model_info(m).effective_live]
+        for model in models:
+            n = backfill_effective_live_from(model, batch_size=options['batch_size'])
+            # Rows that were hidden (or not) by a stale column may have changed sides of the gate.
+            bump_gatekeeper_version(model)
+            self.stdout.write('%s: %d rows' % (model._meta.label, n))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...cache import get_model
+from ...prerender import get_prerender_root, get_prerender_views, prerender
+from ...registry import get_model_info
+
+class Command(BaseCommand):
+    help = "Renders the live pages of gatekeeper models to static files (see GATEKEEPER_PRERENDER_VIEWS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('views', nargs='*', metavar='url-name=app_label.ModelName',
+            help='Only render these (default: GATEKEEPER_PRERENDER_VIEWS).')
+        parser.add_argument('--root', default=None,
+            help='Where to write the pages (default: GATEKEEPER_PRERENDER_ROOT).')
+        parser.add_argument('--processes', type=int, default=4,
+            help='How many processes to render with.')
+        parser.add_argument('--chunk-size', type=int, default=500,
+            help='How many pages each process renders at a time.')
+        parser.add_argument('--incremental', action='store_true', default=False,
+            help="Only render pages whose gate changed since the last run.")
+
+    def handle(self, *args, **options):
+        if options['views']:
+            views = []
+            for arg in options['views']:
+                if '=' not in arg:
+                    raise CommandError('Expected url-name=app_label.ModelName, not %r.' % arg)
+                views.append(tuple(arg.split('=', 1)))
+        else:
+            views = get_prerender_views()
+        if not views:
+            raise CommandError('Nothing to prerender: set GATEKEEPER_PRERENDER_VIEWS.')
+        for view in views:
+            if get_model_info(get_model(view[1])) is None:
+                raise CommandError('%s is not a gatekeeper model.' % view[1])
+        root = options['root'] or get_prerender_root()
+        if not root:
+            raise CommandError('Nowhere to prerender to: set GATEKEEPER_PRERENDER_ROOT or use --root.')
+
+        results = prerender(views, root=root, processes=options['processes'],
+            chunk_size=options['chunk_size'], incremental=options['incremental'])
+        for path, error in results['failed']:
+            self.stderr.write('%s FAILED: %s' % (path, error))
+        self.stdout.write('%d rendered, %d unchanged, %d removed, %d failed.' % (
+            len(results['rendered']), len(results['skipped']), len(results['removed']), len(results['failed'])
+        ))
+        if results['failed']:
+            raise CommandError('%d pages could not be prerendered.' % len(results['failed']))
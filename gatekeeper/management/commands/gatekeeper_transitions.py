@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...transitions import process_all_transitions
+
+class Command(BaseCommand):
+    help = "Catches up gatekeeper objects whose live_as_of date has arrived (flipping gatekeeper_is_live where there is one)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+            help='How many rows to claim (and flip) at a time.')
+        parser.add_argument('--interval', type=int, default=0,
+            help='Keep running, checking every INTERVAL seconds (default: run once and exit).')
+
+    def handle(self, *args, **options):
+        while True:
+            results = process_all_transitions(batch_size=options['batch_size'])
+            for model, n in results.items():
+                if n:
+                    self.stdout.write('%s: %d transitioned' % (model._meta.label, n))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
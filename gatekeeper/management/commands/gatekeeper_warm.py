@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...cache import get_model
+from ...registry import get_model_info
+from ...warming import get_gatekeeper_models, warm_gatekeeper_caches
+
+class Command(BaseCommand):
+    help = "Precomputes serial winners, live objects and state counts for every gatekeeper model into the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', metavar='app_label.ModelName',
+            help='Only warm these models (default: all gatekeeper models).')
+        parser.add_argument('--workers', type=int, default=4,
+            help='How many to compute at once (each with its own database connection).')
+
+    def handle(self, *args, **options):
+        if options['models']:
+            models = [get_model(label) for label in options['models']]
+            for model in models:
+                if get_model_info(model) is None:
+                    raise CommandError('%s is not a gatekeeper model.' % model._meta.label)
+        else:
+            models = get_gatekeeper_models()
+        failed = 0
+        for label, what, error in warm_gatekeeper_caches(models, workers=options['workers']):
+            if error is None:
+                self.stdout.write('%s: %s' % (label, what))
+            else:
+                failed += 1
+                self.stderr.write('%s: %s FAILED: %s' % (label, what, error))
+        if failed:
+            raise CommandError('%d gatekeeper caches could not be warmed.' % failed)
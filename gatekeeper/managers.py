@@ -0,0 +1,26 @@
+from django.db import models
+
+from .related import resolve_gatekeeper_prefetches
+from .view_utils import view_gatekeeper
+
+class GatekeeperQuerySet(models.QuerySet):
+    """
+    Adds the gatekeeper to querysets, e.g.:
+
+        Article.objects.live()              # what the public can see
+        Article.objects.gated(is_auth)      # what this user can see (same as view_gatekeeper)
+
+    It also fills in GatekeeperPrefetch lookups (see related.py) that weren't given a queryset.
+    """
+    def live(self):
+        return view_gatekeeper(self, False)
+
+    def gated(self, is_auth):
+        return view_gatekeeper(self, is_auth)
+
+    def prefetch_related(self, *lookups):
+        return super(GatekeeperQuerySet, self).prefetch_related(
+            *resolve_gatekeeper_prefetches(self.model, lookups)
+        )
+
+GatekeeperManager = models.Manager.from_queryset(GatekeeperQuerySet)
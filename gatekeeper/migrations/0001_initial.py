@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-19 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GatekeeperChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(db_index=True, help_text="The model's label, e.g. news.article", max_length=100, verbose_name='Model')),
+                ('object_pk', models.CharField(max_length=64, verbose_name='Object PK')),
+                ('old_state', models.CharField(blank=True, max_length=10, verbose_name='Old State')),
+                ('new_state', models.CharField(blank=True, max_length=10, verbose_name='New State')),
+                ('effective_at', models.DateTimeField(db_index=True, help_text='When the change actually happened (e.g., the live_as_of date, for a scheduled object)', verbose_name='Effective At')),
+            ],
+            options={
+                'verbose_name': 'Gatekeeper Change',
+                'verbose_name_plural': 'Gatekeeper Changes',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -1,14 +1,24 @@
-import pytz
-from datetime import datetime
+import json
 
-from django.db.models import Q
-from django.http import Http404
+import django
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.translation import ugettext as _
 from django.shortcuts import get_object_or_404
 from django.views.generic.base import ContextMixin
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic.list import MultipleObjectMixin
 
+from .cache import get_gatekeeper_cache, get_model_version, get_timeout_until_transition, make_gatekeeper_key
+from .objectcache import get_cached_object, is_known_not_live, remember_not_live
+from .pagination import InvalidCursor, KeysetPaginator, decode_cursor, encode_cursor, parse_cursor_pk
+from .purge import add_surrogate_keys, model_tag, object_tag, serial_tag
+from .routers import gatekeeper_db_for_read, route_gatekeeper_read
+from .timeline import get_timeline_winner
 from .utils import can_object_page_be_shown, get_appropriate_object_from_model
+from .view_utils import view_gatekeeper
+from .warming import get_serial_winner_pk
 
 """
 
@@ -28,10 +38,49 @@ class GatekeeperAuthenticationMixin(ContextMixin):
         context['is_logged_in'] = self.request.user.is_authenticated
         return context
 
+    def get_surrogate_keys(self, response):
+        """
+        The tags for this response, for purging it from a CDN (see purge.py).
+        Everything is tagged with its model;  the subclasses add the objects they show.
+        """
+        model = getattr(self, 'model', None)
+        if model is None and getattr(self, 'queryset', None) is not None:
+            model = self.queryset.model
+        if model is None:
+            return []
+        return [model_tag(model)]
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super(GatekeeperAuthenticationMixin, self).dispatch(request, *args, **kwargs)
+        # Template responses aren't rendered yet, and we want to tag what actually got shown.
+        if getattr(response, 'is_rendered', True):
+            add_surrogate_keys(response, self.get_surrogate_keys(response))
+        else:
+            response.add_post_render_callback(lambda r: add_surrogate_keys(r, self.get_surrogate_keys(r)))
+        return response
+
 class GatekeeperListMixin(MultipleObjectMixin, GatekeeperAuthenticationMixin):
     """
     This is for Listing views that apply to all object ListView classes.
+
+    Setting keyset_pagination = True (along with paginate_by) replaces Django's OFFSET-based Paginator with
+    keyset pagination on (live_as_of, pk) --- see pagination.py.   Pages are requested with an opaque
+    ?cursor=... (page_obj.next_cursor and page_obj.previous_cursor) instead of ?page=N, and page N costs
+    the same as page 1.
+
+    Since the COUNT(*) is the other expensive part, keyset_count controls paginator.count:
+        None: no count at all (the default)
+        'exact': count every time
+        'cached': count once, and cache it until an object is saved or the next object goes live
+
+    Responses are tagged with each object on the page (see purge.py) --- unless there are more than
+    surrogate_key_limit of them, when they're only tagged with the model (CDNs cap the header, e.g. Fastly at 16KB).
     """
+    keyset_pagination = False
+    keyset_count = None
+    cursor_kwarg = 'cursor'
+    surrogate_key_limit = 50
+
     def get_queryset(self):
         qs = super(GatekeeperListMixin, self).get_queryset()
         
@@ -42,13 +91,157 @@ class GatekeeperListMixin(MultipleObjectMixin, GatekeeperAuthenticationMixin):
         user = self.request.user
         if not user.is_authenticated:
             # If you are not logged in, then live_as_of must exist (not None) and must be in the past.
-            condition_1 = Q(publish_status=0)
-            condition_2 = Q(live_as_of__gt=datetime.now(pytz.utc))
-            condition_3 = Q(live_as_of__isnull=True)
-            qs = qs.exclude(condition_1 & condition_2)
-            qs = qs.exclude(condition_1 & condition_3)
+            qs = view_gatekeeper(qs, False)
         return qs
 
+    def get_surrogate_keys(self, response):
+        keys = super(GatekeeperListMixin, self).get_surrogate_keys(response)
+        context = getattr(response, 'context_data', None) or {}
+        objects = list(context.get('object_list') or [])
+        if len(objects) <= self.surrogate_key_limit:
+            keys += [object_tag(obj) for obj in objects]
+        return keys
+
+    def get_keyset_count(self, queryset):
+        """
+        Returns the count (or a callable that returns it) for the keyset paginator.
+        """
+        if self.keyset_count == 'exact':
+            return queryset.count
+        if self.keyset_count == 'cached':
+            def cached_count():
+                cache = get_gatekeeper_cache()
+                key = make_gatekeeper_key(
+                    'count', [queryset.model],
+                    self.__class__.__module__, self.__class__.__name__,
+                    self.request.user.is_authenticated, sorted(self.kwargs.items())
+                )
+                count = cache.get(key)
+                if count is None:
+                    count = queryset.count()
+                    cache.set(key, count, get_timeout_until_transition([queryset.model]))
+                return count
+            return cached_count
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.keyset_pagination:
+            return super(GatekeeperListMixin, self).paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, count=self.get_keyset_count(queryset))
+        cursor = self.kwargs.get(self.cursor_kwarg) or self.request.GET.get(self.cursor_kwarg)
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor as e:
+            raise Http404(_('Invalid page (%(page_number)s): %(message)s') % {
+                'page_number': cursor,
+                'message': str(e)
+            })
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+class GatekeeperJSONStreamMixin(GatekeeperListMixin):
+    """
+    Streams the (gated) list as JSON, without ever holding the whole list in memory:
+
+        class ArticleJSONView(GatekeeperJSONStreamMixin, View):
+            model = Article
+            json_fields = ('id', 'title', 'live_as_of')
+
+    GET returns {"results": [{...}, ...], "next": <cursor or null>}, in pk order, sent as it's read from the
+    database (json_chunk_size rows at a time).   The client can ask for:
+        ?fields=id,title    only some of the json_fields (default: all of them; default json_fields: every field)
+        ?limit=1000         at most this many (never more than json_limit, if that's set)
+        ?cursor=...         carry on from where the "next" of the last response left off
+    """
+    json_fields = None
+    json_chunk_size = 2000
+    json_limit = None
+    fields_kwarg = 'fields'
+    limit_kwarg = 'limit'
+
+    def get_json_fields(self, model):
+        """
+        The fields to send: the ones asked for with ?fields=, if they're all allowed.   Raises ValueError if not.
+        """
+        allowed = list(self.json_fields or [f.attname for f in model._meta.concrete_fields])
+        requested = self.request.GET.get(self.fields_kwarg)
+        if not requested:
+            return allowed
+        fields = [f.strip() for f in requested.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in allowed]
+        if unknown or not fields:
+            raise ValueError('Unknown fields: %s' % ', '.join(unknown))
+        return fields
+
+    def get_json_limit(self):
+        limit = self.request.GET.get(self.limit_kwarg)
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 1:
+            raise ValueError('limit must be at least 1')
+        if self.json_limit is not None and (limit is None or limit > self.json_limit):
+            limit = self.json_limit
+        return limit
+
+    def get_json_after(self, model):
+        """
+        The pk to carry on after (from ?cursor=...), or None.   This has to be checked before the response
+        starts: once the headers have gone out, an error in stream_json() can only truncate the body.
+        """
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        if not cursor:
+            return None
+        try:
+            value = decode_cursor(cursor)
+            if not isinstance(value, list) or not value:
+                raise InvalidCursor('Invalid cursor: %r' % (value,))
+            return parse_cursor_pk(model, value[0])
+        except InvalidCursor as e:
+            raise ValueError(_('Invalid cursor (%(cursor)s): %(message)s') % {'cursor': cursor, 'message': str(e)})
+
+    def stream_json(self, queryset, fields, limit=None, after=None):
+        """
+        Yields the response in pieces.   Rows are (pk, *fields) so the cursor always has the pk to work with.
+        """
+        qs = queryset.order_by('pk')
+        if after is not None:
+            qs = qs.filter(pk__gt=after)
+        rows = qs.values_list('pk', *fields)
+        if django.VERSION >= (2, 0):
+            rows = rows.iterator(chunk_size=self.json_chunk_size)
+        else:
+            rows = rows.iterator()  # 1.11 has no chunk_size (it reads GET_ITERATOR_CHUNK_SIZE rows at a time)
+        encoder = DjangoJSONEncoder()
+        yield '{"results":['
+        count = 0
+        last_pk = None
+        more = False
+        pending = []
+        for row in rows:
+            if limit is not None and count >= limit:
+                more = True
+                break
+            pending.append(encoder.encode(dict(zip(fields, row[1:]))))
+            count += 1
+            last_pk = row[0]
+            if len(pending) >= self.json_chunk_size:
+                yield (',' if count > len(pending) else '') + ','.join(pending)
+                pending = []
+        if pending:
+            yield (',' if count > len(pending) else '') + ','.join(pending)
+        next_cursor = encode_cursor([last_pk]) if more else None
+        yield '],"next":%s}' % json.dumps(next_cursor)
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        try:
+            fields = self.get_json_fields(queryset.model)
+            limit = self.get_json_limit()
+            after = self.get_json_after(queryset.model)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+        return StreamingHttpResponse(
+            self.stream_json(queryset, fields, limit=limit, after=after), content_type='application/json'
+        )
+
 class GatekeeperDetailMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
     """
     This is for detail views that apply to all object DetailView classes.
@@ -56,10 +249,65 @@ class GatekeeperDetailMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
     WE CANNOT USE the "available_to_public" property as a quick, "simple" workaround because you have to be able
     to reliably send the self.request.user to the gatekeeper (available_to_public is really only supposed
     to be used as a test within TEMPLATES, i.e., AFTER the gatekeeper has done its job!)
+
+    Set gatekeeper_cache_object = True to cache the object for public requests, in memory in each process
+    and in the shared cache, until its gate changes or an object of the model is saved (see objectcache.py).
+
+    Set gatekeeper_cache_404 = True to remember which objects the public got a 404 for (because they aren't live),
+    so asking again doesn't touch the database until the object goes live or is saved.
     """
+    gatekeeper_cache_object = False
+    gatekeeper_cache_404 = False
+
+    def get_object_lookup(self):
+        """
+        The lookup that SingleObjectMixin.get_object() would do (e.g., {'pk': '42'}), or None.
+        """
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        lookup = {}
+        if pk is not None:
+            lookup['pk'] = pk
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            lookup[self.get_slug_field()] = slug
+        return lookup or None
+
+    def get_object_cache_key_parts(self):
+        return (self.__class__.__module__, self.__class__.__name__)
+
+    def get_cached_public_object(self, queryset, lookup, version):
+        """
+        For public requests:  the object from the object cache, or None if it has to come from the database.
+        Raises Http404 straight away for lookups that are known not to be live.   version is the model's
+        version from before anything was read.
+        """
+        key_parts = self.get_object_cache_key_parts()
+        if self.gatekeeper_cache_404 and is_known_not_live(queryset.model, lookup, key_parts=key_parts,
+                version=version):
+            raise Http404()
+        if not self.gatekeeper_cache_object:
+            return None
+        try:
+            return get_cached_object(queryset, lookup, key_parts=key_parts, version=version)
+        except queryset.model.DoesNotExist:
+            raise Http404(_("No %(verbose_name)s found matching the query") %
+                {'verbose_name': queryset.model._meta.verbose_name})
+
     def get_object(self, queryset=None):
-        obj = super(GatekeeperDetailMixin, self).get_object(queryset=queryset)
         user = self.request.user
+        obj = lookup = version = None
+        if not user.is_authenticated:
+            # Public requests can be served from a read replica.
+            if queryset is None:
+                queryset = self.get_queryset()
+            queryset = route_gatekeeper_read(queryset, False)
+            lookup = self.get_object_lookup()
+            if lookup is not None and (self.gatekeeper_cache_object or self.gatekeeper_cache_404):
+                # Whatever gets cached below is cached under the version from before the object was read.
+                version = get_model_version(queryset.model)
+                obj = self.get_cached_public_object(queryset, lookup, version)
+        if obj is None:
+            obj = super(GatekeeperDetailMixin, self).get_object(queryset=queryset)
         
         #### This code needs to be re-integrated if parental object gatekeeping is a feature we want to have.
         #try:
@@ -76,7 +324,15 @@ class GatekeeperDetailMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
         if can_object_page_be_shown(user, obj, including_parents=False):
             return obj
 
+        if self.gatekeeper_cache_404 and lookup is not None:
+            remember_not_live(queryset.model, lookup, obj, version, key_parts=self.get_object_cache_key_parts())
         raise Http404()
+
+    def get_surrogate_keys(self, response):
+        keys = super(GatekeeperDetailMixin, self).get_surrogate_keys(response)
+        if getattr(self, 'object', None) is not None:
+            keys.append(object_tag(self.object))
+        return keys
             
 class GatekeeperSerialMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
     """
@@ -87,8 +343,19 @@ class GatekeeperSerialMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
         
         A good example of this is a Homepage app where the content producer can stage multiple instances of the
         homepage to go live at different times.
+
+    Set gatekeeper_cache_winner = True to cache which instance is the winner (for the public) until the next
+    instance goes live or an instance is saved (see warming.py).   Only do this with a cache that all your
+    processes share!
+
+    Or set gatekeeper_use_timeline = True to keep the whole upcoming schedule (and the winning objects) in memory,
+    in each process, and just look up "now" in it (see timeline.py).   It's only rebuilt when an instance is saved,
+    so the only per-request cost is checking the model's cache version.   As with gatekeeper_cache_winner, only do
+    this with a cache that all your processes share!
     """
-        
+    gatekeeper_cache_winner = False
+    gatekeeper_use_timeline = False
+
     def get_object(self, queryset=None):
         """
         Note that we do NOT call super() here!
@@ -100,10 +367,27 @@ class GatekeeperSerialMixin(SingleObjectMixin, GatekeeperAuthenticationMixin):
         if self.kwargs.get('pk') and self.request.user.is_staff:
             result = get_object_or_404(self.model, id=self.kwargs.get('pk'))
         else:
-            winner = get_appropriate_object_from_model(self.model)
-            if winner:
-                id = winner.id
-            else:
-                id = None
-            result = get_object_or_404(self.model, id=id)
-        return result
\ No newline at end of file
+            # The winner is what the public sees, so it can come from a read replica
+            # (unless you're logged in).
+            is_auth = self.request.user.is_authenticated
+            if self.gatekeeper_use_timeline and not is_auth:
+                result = get_timeline_winner(self.model)
+                if result is None:
+                    raise Http404()
+                return result
+            using = gatekeeper_db_for_read(self.model, is_auth)
+            if self.gatekeeper_cache_winner and not is_auth:
+                qs = self.model._default_manager.all()
+                if using is not None:
+                    qs = qs.using(using)
+                return get_object_or_404(qs, pk=get_serial_winner_pk(self.model))
+            result = get_appropriate_object_from_model(self.model, using=using)
+            if result is None:
+                raise Http404()
+        return result
+
+    def get_surrogate_keys(self, response):
+        keys = super(GatekeeperSerialMixin, self).get_surrogate_keys(response) + [serial_tag(self.model)]
+        if getattr(self, 'object', None) is not None:
+            keys.append(object_tag(self.object))
+        return keys
\ No newline at end of file
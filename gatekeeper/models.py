@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
-from .utils import can_object_page_be_shown_to_pubilc
+from .managers import GatekeeperManager
+from .utils import can_object_page_be_shown_to_pubilc, get_effective_live_from
 
 PUBLISH_STATUS_LIST = (
     (-1, 'NEVER Available'),
@@ -45,6 +46,8 @@ class GatekeeperAbstractModel(models.Model):
         help_text = 'You can Set this to a future date/time to schedule availability.'
     )
     
+    objects = GatekeeperManager()
+
     ### This sets up the ability for gatekeeping hierarchies.
     #parental_model_field = None
     
@@ -79,4 +82,110 @@ class GatekeeperSerialAbstractModel(GatekeeperAbstractModel):
     )
     
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+class GatekeeperIsLiveAbstractModel(models.Model):
+    """
+    OPTIONAL: a denormalized gatekeeper_is_live column, for models where the public gate should be a plain
+    indexed equality (gatekeeper_is_live = True) instead of a comparison against the current time.
+
+    Add it alongside either of the gatekeeper models, e.g.:
+
+        class Article(GatekeeperIsLiveAbstractModel, GatekeeperAbstractModel):
+            ...
+
+    gatekeeper_is_live is set every time the object is saved.   Objects that are scheduled to go live later
+    get flipped when their live_as_of date arrives by the gatekeeper_transitions management command
+    (see transitions.py) --- so that needs to be run regularly (e.g., every minute from cron, or with --interval).
+
+    Once it's in place, view_gatekeeper(), GatekeeperListMixin and Model.objects.live() all use it.
+
+    (It isn't called is_live because GatekeeperSerialAdmin already has an is_live column --- the current winner.)
+    """
+    gatekeeper_live_flag = True
+
+    gatekeeper_is_live = models.BooleanField (
+        _('Is Live'), default = False, db_index = True, editable = False,
+        help_text = "Maintained by the gatekeeper: is this available to the public right now?"
+    )
+
+    def save(self, *args, **kwargs):
+        self.gatekeeper_is_live = can_object_page_be_shown_to_pubilc(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'gatekeeper_is_live' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['gatekeeper_is_live']
+        super(GatekeeperIsLiveAbstractModel, self).save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+class GatekeeperEffectiveLiveAbstractModel(models.Model):
+    """
+    OPTIONAL: a derived effective_live_from column --- when the object is live to the public from, as one value:
+
+        publish_status =  1: the distant past (ALWAYS_LIVE_FROM in utils.py)
+        publish_status =  0: live_as_of (NULL if it's never been published)
+        publish_status = -1: NULL (never)
+
+    so the public gate is a single indexed range, effective_live_from <= now, instead of an OR over
+    publish_status and live_as_of --- and "most recently live" (serial Rule 2) reads straight off the same index.
+
+    Add it alongside either of the gatekeeper models, e.g.:
+
+        class Article(GatekeeperEffectiveLiveAbstractModel, GatekeeperAbstractModel):
+            ...
+
+    Unlike gatekeeper_is_live, it doesn't depend on the clock, so nothing has to flip it when the time comes.
+    It's set every time the object is saved (so queryset.update() on publish_status or live_as_of skips it!)
+    """
+    gatekeeper_effective_live = True
+
+    effective_live_from = models.DateTimeField (
+        _('Effective Live From'), null = True, blank = True, db_index = True, editable = False,
+        help_text = "Maintained by the gatekeeper: when this is live to the public from (empty = never)"
+    )
+
+    def save(self, *args, **kwargs):
+        self.effective_live_from = get_effective_live_from(self.publish_status, self.live_as_of)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'effective_live_from' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['effective_live_from']
+        super(GatekeeperEffectiveLiveAbstractModel, self).save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+class GatekeeperChange(models.Model):
+    """
+    One entry in the gatekeeper change log: an object of a gatekeeper model moved from one publish state to another
+    (see changelog.py).   Entries are only ever added, so the id is a cursor:  "everything after change 1234".
+
+    old_state is '' for a new object (or if it isn't known), and new_state is '' for a deleted one.
+    """
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField (
+        _('Model'), max_length = 100, db_index = True,
+        help_text = "The model's label, e.g. news.article"
+    )
+    object_pk = models.CharField (
+        _('Object PK'), max_length = 64
+    )
+    old_state = models.CharField (
+        _('Old State'), max_length = 10, blank = True
+    )
+    new_state = models.CharField (
+        _('New State'), max_length = 10, blank = True
+    )
+    effective_at = models.DateTimeField (
+        _('Effective At'), db_index = True,
+        help_text = "When the change actually happened (e.g., the live_as_of date, for a scheduled object)"
+    )
+
+    def __str__(self):
+        return '%s:%s %s -> %s' % (self.model, self.object_pk, self.old_state or '(new)',
+            self.new_state or '(deleted)')
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Gatekeeper Change'
+        verbose_name_plural = 'Gatekeeper Changes'
@@ -0,0 +1,187 @@
+import copy
+import pytz
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+
+from .cache import (
+    get_default_timeout, get_gatekeeper_cache, get_model_label, get_model_version, make_gatekeeper_key
+)
+
+"""
+A two-level cache for public detail-page lookups (see GatekeeperDetailMixin.gatekeeper_cache_object).
+
+    L1: a small LRU dict in each process --- a hit costs a dict lookup (and one read of the model's version)
+    L2: the Django cache (GATEKEEPER_CACHE), shared by all the processes
+
+Entries are keyed on the model and the lookup (e.g., pk=42), and they're thrown away:
+
+    1. when the object's gate is next going to change (i.e., its live_as_of, if that's in the future),
+        and never later than GATEKEEPER_CACHE_TIMEOUT;
+    2. when any object of the model is saved or deleted (or goes live on schedule), because that bumps the model's
+        version in the shared cache (see signals.py) --- which is how a save in one process reaches every other
+        process's L1.
+
+The model's version is read once, BEFORE the database is: if a save lands between the read and the store, what
+was read is stored under the old version (where nobody will look for it) rather than the new one.   Callers that
+look something up over several steps (like GatekeeperDetailMixin) read the version first and pass it in.
+
+The same two levels also remember which lookups are NOT live to the public (remember_not_live() and
+is_known_not_live()), so crawlers hitting draft and scheduled URLs get their 404 without a query.   Those expire
+right when the object's live_as_of comes around, when something is saved, or after GATEKEEPER_NOT_LIVE_TIMEOUT
+--- whichever comes first.
+
+Settings:
+    GATEKEEPER_OBJECT_CACHE_SIZE: how many objects each process keeps in L1 (default: 2000)
+    GATEKEEPER_NOT_LIVE_TIMEOUT: the longest (in seconds) a 404 is remembered (default: 3600)
+"""
+
+class LocalLRUCache(object):
+    """
+    A bounded, thread-safe, least-recently-used dict.
+    """
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_max_entries(self):
+        if self.max_entries is not None:
+            return self.max_entries
+        return getattr(settings, 'GATEKEEPER_OBJECT_CACHE_SIZE', 2000)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.pop(key, None)
+            if value is not None:
+                # Put it back at the (most recently used) end.
+                self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        max_entries = self.get_max_entries()
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+_local = LocalLRUCache()
+
+def get_object_expiry(obj, now=None):
+    """
+    When (as a timestamp) a cached copy of the object has to go: at its next gate transition, or
+    GATEKEEPER_CACHE_TIMEOUT from now, whichever comes first.   (None means never.)
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    timeout = get_default_timeout()
+    expiry = time.time() + timeout if timeout is not None else None
+    live_as_of = getattr(obj, 'live_as_of', None)
+    if getattr(obj, 'publish_status', None) == 0 and live_as_of is not None and live_as_of > now:
+        transition = time.time() + (live_as_of - now).total_seconds()
+        if expiry is None or transition < expiry:
+            expiry = transition
+    return expiry
+
+def _is_fresh(expiry):
+    return expiry is None or expiry > time.time()
+
+def _get_keys(prefix, model, lookup, key_parts, version):
+    """
+    Returns (the L1 key, the L2 key) for the model at that version.
+    """
+    label = get_model_label(model)
+    parts = (prefix,) + tuple(key_parts) + tuple(sorted(lookup.items()))
+    return (label,) + parts, make_gatekeeper_key('object', [], '%s.%s' % (label, version), *parts)
+
+def _get(prefix, model, lookup, key_parts, version):
+    """
+    Returns (found, value) from L1, or else L2 (which then fills L1).
+    """
+    key, shared_key = _get_keys(prefix, model, lookup, key_parts, version)
+    entry = _local.get(key)
+    if entry is not None:
+        entry_version, expiry, value = entry
+        if entry_version == version and _is_fresh(expiry):
+            return True, value
+        _local.delete(key)
+    cached = get_gatekeeper_cache().get(shared_key)
+    if cached is not None and _is_fresh(cached[1]):
+        value, expiry = cached
+        _local.set(key, (version, expiry, value))
+        return True, value
+    return False, None
+
+def _set(prefix, model, lookup, key_parts, version, value, expiry):
+    key, shared_key = _get_keys(prefix, model, lookup, key_parts, version)
+    timeout = int(expiry - time.time()) + 1 if expiry is not None else None
+    get_gatekeeper_cache().set(shared_key, (value, expiry), timeout)
+    _local.set(key, (version, expiry, value))
+
+def get_cached_object(queryset, lookup, key_parts=(), version=None):
+    """
+    queryset.get(**lookup), through the L1 and L2 caches.   Raises the model's DoesNotExist like get() does.
+
+    key_parts are added to the cache key: pass something that identifies the queryset (e.g., the view)
+    if it's filtered.   version is the model's version from before anything was read (it's read now if it isn't
+    passed).   Returns a copy of the object, so nobody changes the cached one.
+    """
+    model = queryset.model
+    if version is None:
+        version = get_model_version(model)
+    found, obj = _get('object', model, lookup, key_parts, version)
+    if not found:
+        obj = queryset.get(**lookup)
+        _set('object', model, lookup, key_parts, version, obj, get_object_expiry(obj))
+    return copy.copy(obj)
+
+def get_not_live_timeout():
+    return getattr(settings, 'GATEKEEPER_NOT_LIVE_TIMEOUT', 3600)
+
+def get_not_live_expiry(obj, now=None):
+    """
+    How long "the public can't see this object" holds (as a timestamp): until its live_as_of if that's in the
+    future, but never longer than GATEKEEPER_NOT_LIVE_TIMEOUT.   (Saving anything of the model ends it early,
+    through the model's version.)   Drafts and offline objects get the timeout too, so nothing stays
+    remembered forever.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    expiry = time.time() + get_not_live_timeout()
+    live_as_of = getattr(obj, 'live_as_of', None)
+    if getattr(obj, 'publish_status', None) == 0 and live_as_of is not None and live_as_of > now:
+        expiry = min(expiry, time.time() + (live_as_of - now).total_seconds())
+    return expiry
+
+def remember_not_live(model, lookup, obj, version, key_parts=()):
+    """
+    Records that the public got a 404 for this lookup (see is_known_not_live()).   version has to be the model's
+    version from BEFORE the object was read.
+    """
+    _set('not_live', model, lookup, key_parts, version, True, get_not_live_expiry(obj))
+
+def is_known_not_live(model, lookup, key_parts=(), version=None):
+    """
+    True if the lookup is known to 404 for the public (without asking the database).
+    """
+    if version is None:
+        version = get_model_version(model)
+    return _get('not_live', model, lookup, key_parts, version)[0]
+
+def clear_local_object_cache():
+    _local.clear()
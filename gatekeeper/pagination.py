@@ -0,0 +1,179 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils import six
+from django.utils.dateparse import parse_datetime
+
+"""
+Keyset (a.k.a. "seek") pagination for gatekeeper querysets.
+
+Django's Paginator uses OFFSET (and a COUNT(*) over the whole filtered table) so page 500 costs a lot
+more than page 1.   Keyset pagination instead remembers WHERE the last page ended --- the (live_as_of, pk)
+of its last object --- and asks for the next objects after that, which is an index seek no matter how deep
+you go.
+
+Objects are ordered most-recently-live first.   Objects with no live_as_of (e.g., ALWAYS Available objects
+that never went through the publish step) come last.   They're read as two queries --- the dated rows on
+(-live_as_of, -pk), then the undated ones on -pk --- rather than one ORDER BY live_as_of DESC NULLS LAST,
+which an ordinary index can't serve on every database (PostgreSQL would sort the whole filtered table for
+every page).   To make the seek an index scan, add an index on (live_as_of, pk) to your model:
+
+    class Meta:
+        indexes = [models.Index(fields=['live_as_of', 'id'])]
+
+The "where the last page ended" is handed to the client as an opaque cursor string.
+"""
+
+class InvalidCursor(Exception):
+    pass
+
+def encode_cursor(data):
+    """
+    Turns a JSON-able structure into an opaque, URL-safe string.
+    """
+    raw = json.dumps(data, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    The inverse of encode_cursor() --- raises InvalidCursor if someone's been fiddling with it.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (TypeError, ValueError, UnicodeError):
+        raise InvalidCursor('Invalid cursor: %r' % cursor)
+
+def parse_cursor_datetime(value):
+    if value is None:
+        return None
+    if not isinstance(value, six.string_types):
+        raise InvalidCursor('Invalid date in cursor: %r' % (value,))
+    dt = parse_datetime(value)
+    if dt is None:
+        raise InvalidCursor('Invalid date in cursor: %r' % value)
+    return dt
+
+def parse_cursor_pk(model, value):
+    """
+    Checks the cursor's pk against the model's pk field (so integer, UUID and string pks all work) ---
+    anything else would blow up later, when the query is run.
+    """
+    if value is None or isinstance(value, (bool, list, dict)):
+        raise InvalidCursor('Invalid pk in cursor: %r' % (value,))
+    try:
+        return model._meta.pk.to_python(value)
+    except ValidationError:
+        raise InvalidCursor('Invalid pk in cursor: %r' % (value,))
+
+def keyset_parts(queryset, direction='n', live_as_of=None, pk=None, cursor=False):
+    """
+    The querysets to read a page from, in order:  everything AFTER (live_as_of, pk) in (-live_as_of NULLS LAST,
+    -pk) order for direction 'n', everything BEFORE it (nearest first) for 'p'.   Each is a plain range on an
+    ordering that an index can serve.
+    """
+    dated = queryset.filter(live_as_of__isnull=False)
+    undated = queryset.filter(live_as_of__isnull=True)
+    if direction == 'n':
+        if not cursor:
+            return [dated.order_by('-live_as_of', '-pk'), undated.order_by('-pk')]
+        if live_as_of is None:
+            return [undated.filter(pk__lt=pk).order_by('-pk')]
+        dated = dated.filter(Q(live_as_of__lt=live_as_of) | Q(live_as_of=live_as_of, pk__lt=pk))
+        return [dated.order_by('-live_as_of', '-pk'), undated.order_by('-pk')]
+    if live_as_of is None:
+        return [undated.filter(pk__gt=pk).order_by('pk'), dated.order_by('live_as_of', 'pk')]
+    dated = dated.filter(Q(live_as_of__gt=live_as_of) | Q(live_as_of=live_as_of, pk__gt=pk))
+    return [dated.order_by('live_as_of', 'pk')]
+
+class KeysetPage(object):
+    """
+    Quacks enough like a django.core.paginator.Page for the usual template code:
+    has_next, has_previous, has_other_pages and the cursors to get to the neighboring pages.
+    """
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+class KeysetPaginator(object):
+    """
+    Paginates a queryset on (live_as_of, pk).
+
+    count is optional because that's the expensive part: pass a callable that returns it
+    (e.g., one that caches it) or leave it out and paginator.count will be None.
+    """
+    def __init__(self, queryset, per_page, count=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self._count = count
+
+    @property
+    def count(self):
+        if self._count is None:
+            return None
+        if callable(self._count):
+            self._count = self._count()
+        return self._count
+
+    def _cursor_for(self, direction, obj):
+        live_as_of = obj.live_as_of.isoformat() if obj.live_as_of is not None else None
+        return encode_cursor([direction, live_as_of, obj.pk])
+
+    def _decode(self, cursor):
+        """
+        Returns the cursor's (direction, live_as_of, pk), or raises InvalidCursor.
+        """
+        try:
+            direction, live_as_of, pk = decode_cursor(cursor)
+        except (InvalidCursor, TypeError, ValueError):
+            raise InvalidCursor('Invalid cursor: %r' % cursor)
+        if direction not in ('n', 'p'):
+            raise InvalidCursor('Invalid cursor: %r' % cursor)
+        return direction, parse_cursor_datetime(live_as_of), parse_cursor_pk(self.queryset.model, pk)
+
+    def page(self, cursor=None):
+        """
+        Returns the page that the cursor points at (the first page if there's no cursor).
+        """
+        direction, live_as_of, pk = self._decode(cursor) if cursor else ('n', None, None)
+
+        # Ask for one extra to see if there's anything beyond this page.
+        object_list = []
+        for qs in keyset_parts(self.queryset, direction, live_as_of, pk, cursor=bool(cursor)):
+            object_list.extend(qs[:self.per_page + 1 - len(object_list)])
+            if len(object_list) > self.per_page:
+                break
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if direction == 'p':
+            object_list.reverse()
+
+        next_cursor = previous_cursor = None
+        if object_list:
+            if (direction == 'n' and has_more) or (direction == 'p' and cursor):
+                next_cursor = self._cursor_for('n', object_list[-1])
+            if (direction == 'p' and has_more) or (direction == 'n' and cursor):
+                previous_cursor = self._cursor_for('p', object_list[0])
+        return KeysetPage(object_list, self, next_cursor=next_cursor, previous_cursor=previous_cursor)
@@ -0,0 +1,266 @@
+import json
+import multiprocessing
+import os
+import tempfile
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.db.transaction import TransactionManagementError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .cache import get_model, get_model_label
+from .registry import get_model_info
+from .utils import get_appropriate_object_from_model
+from .view_utils import view_gatekeeper
+
+"""
+Pre-rendering live pages to static files (the gatekeeper_prerender management command).
+
+For a traffic spike it can be handy to serve the live article and homepage pages straight off disk (or a
+bucket) instead of from Django.   prerender() renders them through your own views --- so the gatekeeper
+mixins, templates and context are exactly what the site would serve to the public --- and writes each one to
+<root>/<url path>/index.html.
+
+Which pages is set with GATEKEEPER_PRERENDER_VIEWS, a list of (url name, model label) pairs --- or triples, if
+the url's keyword argument for the pk isn't called 'pk' --- e.g.:
+
+    GATEKEEPER_PRERENDER_VIEWS = [
+        ('article-detail', 'news.Article'),     # one page per live Article, reverse('article-detail', kwargs={'pk': ...})
+        ('homepage-live', 'home.Homepage'),     # a serial model: just the one page, reverse('homepage-live')
+    ]
+    GATEKEEPER_PRERENDER_ROOT = '/var/www/prerendered'
+
+The live objects are gone through in chunks, and the chunks are rendered by a pool of processes.   Every file
+is written atomically (to a temporary file that's then renamed over the old one), so a web server never sees
+half a page.
+
+What was rendered is kept in a manifest (<root>/gatekeeper-prerender.json).   With incremental=True only pages
+whose gate changed since the last run --- new, different live_as_of or publish_status, a different serial winner,
+or a newer modified date (if the model has one, see registry.py) --- are rendered again.   Either way, pages
+that have gone dark since the last run are removed.
+"""
+
+MANIFEST_NAME = 'gatekeeper-prerender.json'
+
+def get_prerender_views():
+    return list(getattr(settings, 'GATEKEEPER_PRERENDER_VIEWS', []))
+
+def get_prerender_root():
+    return getattr(settings, 'GATEKEEPER_PRERENDER_ROOT', None)
+
+def get_page_filename(root, path):
+    return os.path.join(root, path.strip('/'), 'index.html')
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def _signature(model, values):
+    """
+    What the page for an object depends on, as far as the gate goes.   values is (pk, publish_status,
+    live_as_of[, modified]).
+    """
+    return [get_model_label(model), values[0], values[1]] + [_isoformat(v) for v in values[2:]]
+
+def _fields(model):
+    fields = ['pk', 'publish_status', 'live_as_of']
+    info = get_model_info(model)
+    if info is not None and info.modified_field:
+        fields.append(info.modified_field)
+    return fields
+
+def get_live_pages(url_name, model, pk_kwarg='pk', chunk_size=500):
+    """
+    Yields lists (of up to chunk_size) of (path, signature) for the live pages of one (url name, model).
+    """
+    model = get_model(model)
+    info = get_model_info(model)
+    if info is not None and info.is_serial:
+        winner = get_appropriate_object_from_model(model)
+        if winner is not None:
+            values = [getattr(winner, f) for f in _fields(model)]
+            yield [(reverse(url_name), _signature(model, values))]
+        return
+
+    qs = view_gatekeeper(model._default_manager.all(), False).order_by('pk')
+    last_pk = None
+    while True:
+        chunk_qs = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+        rows = list(chunk_qs.values_list(*_fields(model))[:chunk_size])
+        if not rows:
+            return
+        yield [(reverse(url_name, kwargs={pk_kwarg: row[0]}), _signature(model, row)) for row in rows]
+        last_pk = rows[-1][0]
+
+def write_atomically(filename, content):
+    directory = os.path.dirname(filename)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    fd, temp_name = tempfile.mkstemp(dir=directory, prefix='.gatekeeper-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_name, 0o644)
+        getattr(os, 'replace', os.rename)(temp_name, filename)
+    except Exception:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+
+def render_page(path):
+    """
+    Renders a path the way the public would see it.   Returns the response.
+    """
+    match = resolve(path)
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    return response
+
+def _render_chunk(task):
+    """
+    Renders (and writes) a chunk of paths.   Returns a list of (path, error or None).
+    """
+    root, paths = task
+    results = []
+    for path in paths:
+        try:
+            response = render_page(path)
+            if response.status_code != 200:
+                raise ValueError('got a %d' % response.status_code)
+            write_atomically(get_page_filename(root, path), response.content)
+            results.append((path, None))
+        except Exception as e:
+            results.append((path, e))
+    return results
+
+def load_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+def remove_page(root, path):
+    filename = get_page_filename(root, path)
+    if os.path.exists(filename):
+        os.remove(filename)
+    # Tidy up the directories that are now empty (but never the root).
+    directory = os.path.dirname(filename)
+    while os.path.abspath(directory) != os.path.abspath(root):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+def _collect_pages(views, root, old, chunk_size, incremental):
+    """
+    Works out every live page.   Returns ({path: signature}, the paths that can be skipped, and the
+    (root, paths) chunks to render).
+    """
+    current = {}
+    skipped = []
+    tasks = []
+    for view in views:
+        url_name, model = view[:2]
+        pk_kwarg = view[2] if len(view) > 2 else 'pk'
+        for chunk in get_live_pages(url_name, model, pk_kwarg=pk_kwarg, chunk_size=chunk_size):
+            paths = []
+            for path, signature in chunk:
+                current[path] = signature
+                if incremental and old.get(path) == signature and os.path.exists(get_page_filename(root, path)):
+                    skipped.append(path)
+                else:
+                    paths.append(path)
+            if paths:
+                tasks.append((root, paths))
+    return current, skipped, tasks
+
+def _get_pool(processes):
+    """
+    A pool of forked workers where the platform has fork --- they inherit the settings, even ones configured in
+    code, and don't depend on Python's default start method (spawn on macOS, forkserver on Linux from 3.14).
+
+    Where it doesn't (Windows), each worker is a fresh interpreter that has to run django.setup() first.   That's
+    passed as the initializer itself: a function from this module would import the models to get unpickled,
+    before Django was set up.   (In a forked worker it doesn't do anything.)
+    """
+    context = multiprocessing
+    if hasattr(multiprocessing, 'get_context') and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    return context.Pool(processes, initializer=django.setup)
+
+def _render_chunks(tasks, processes):
+    """
+    Renders the chunks, in a pool of processes if there's more than one of each.
+    Returns a list of (path, error or None) lists.
+    """
+    if processes <= 1 or len(tasks) <= 1:
+        return [_render_chunk(task) for task in tasks]
+    # Forked workers mustn't share the parent's database connections:  close them here, before forking, and
+    # every worker (and then the parent) opens its own.   That would throw away a transaction the caller is in.
+    for connection in connections.all():
+        if connection.in_atomic_block:
+            raise TransactionManagementError(
+                "prerender() can't use a pool of processes inside a transaction (on database %r): call it "
+                "outside atomic(), or with processes=1." % connection.alias
+            )
+    connections.close_all()
+    pool = _get_pool(min(processes, len(tasks)))
+    try:
+        return pool.map(_render_chunk, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+def _record_results(chunks, old, current):
+    """
+    Sorts the results into rendered and failed paths.   Failed paths keep whatever the manifest had for them
+    before (so they're tried again next time).
+    """
+    rendered, failed = [], []
+    for results in chunks:
+        for path, error in results:
+            if error is None:
+                rendered.append(path)
+                continue
+            failed.append((path, error))
+            if path in old:
+                current[path] = old[path]
+            else:
+                current.pop(path, None)
+    return rendered, failed
+
+def prerender(views=None, root=None, processes=4, chunk_size=500, incremental=False):
+    """
+    Renders the live pages for views (a list of (url name, model label[, pk kwarg]); default:
+    GATEKEEPER_PRERENDER_VIEWS) into root (default: GATEKEEPER_PRERENDER_ROOT).
+
+    Returns a dict with lists of the paths that were 'rendered', 'skipped' (unchanged) and 'removed',
+    and of (path, error) for the ones that 'failed'.
+    """
+    if views is None:
+        views = get_prerender_views()
+    if root is None:
+        root = get_prerender_root()
+    if not root:
+        raise ValueError('Nowhere to prerender to: set GATEKEEPER_PRERENDER_ROOT.')
+    if not os.path.isdir(root):
+        os.makedirs(root)
+
+    old = load_manifest(root)
+    current, skipped, tasks = _collect_pages(views, root, old, chunk_size, incremental)
+    rendered, failed = _record_results(_render_chunks(tasks, processes), old, current)
+
+    removed = [path for path in old if path not in current]
+    for path in removed:
+        remove_page(root, path)
+
+    manifest = json.dumps(current, indent=1, sort_keys=True)
+    write_atomically(os.path.join(root, MANIFEST_NAME), manifest.encode('utf-8'))
+    return {'rendered': rendered, 'skipped': skipped, 'removed': removed, 'failed': failed}
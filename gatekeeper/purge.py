@@ -0,0 +1,181 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .cache import get_model_label
+from .registry import get_model_info
+
+"""
+Surrogate keys (a.k.a. cache tags) and CDN purging.
+
+The gatekeeper mixins tag every response with what it was built from:
+
+    the model label                 e.g., news.article          (every page showing articles)
+    each object's key               e.g., news.article:42       (every page showing article 42)
+    serial:<model label>            e.g., serial:home.homepage  (the live page of a serial model)
+
+in Surrogate-Key (space-separated, e.g., Fastly) and Cache-Tag (comma-separated, e.g., Cloudflare) headers.
+So pages can be cached at the edge indefinitely, and purged only when their gate actually changes, which is when:
+
+    1. an object is saved or deleted (including through the Admin actions)
+    2. an object goes live on schedule (see transitions.py)
+
+Purges are sent (after the transaction commits) to the backend in the GATEKEEPER_PURGE_BACKEND setting,
+e.g.:
+
+    GATEKEEPER_PURGE_BACKEND = 'gatekeeper.purge.HTTPPurgeBackend'
+    GATEKEEPER_PURGE_OPTIONS = {'url': 'http://varnish.local/'}
+
+If it isn't set, nothing is purged.   Write your own by subclassing BasePurgeBackend.   A purge that fails
+(e.g., the CDN is down) is logged to the gatekeeper.purge logger, and doesn't break the save that caused it.
+
+Settings:
+    GATEKEEPER_SURROGATE_KEY_HEADERS: which response headers to set (default: ('Surrogate-Key', 'Cache-Tag')).
+        Set it to () to turn tagging off.
+"""
+
+DEFAULT_HEADERS = ('Surrogate-Key', 'Cache-Tag')
+
+logger = logging.getLogger(__name__)
+
+
+def model_tag(model):
+    return get_model_label(model)
+
+def object_tag(obj):
+    return '%s:%s' % (get_model_label(obj.__class__), obj.pk)
+
+def object_tag_for_pk(model, pk):
+    return '%s:%s' % (get_model_label(model), pk)
+
+def serial_tag(model):
+    return 'serial:%s' % get_model_label(model)
+
+def get_tags_for_model(model, pks=()):
+    """
+    Everything that has to be purged when these objects of the model change.
+    """
+    tags = [model_tag(model)] + [object_tag_for_pk(model, pk) for pk in pks]
+    info = get_model_info(model)
+    if info is not None and info.is_serial:
+        tags.append(serial_tag(model))
+    return tags
+
+def add_surrogate_keys(response, tags):
+    """
+    Adds the tags to a response (merging with any already there).
+    """
+    headers = getattr(settings, 'GATEKEEPER_SURROGATE_KEY_HEADERS', DEFAULT_HEADERS)
+    for header in headers:
+        separator = ',' if header.lower() == 'cache-tag' else ' '
+        existing = [t for t in response.get(header, '').replace(',', ' ').split() if t]
+        merged = existing + [t for t in tags if t not in existing]
+        if merged:
+            response[header] = separator.join(merged)
+    return response
+
+class BasePurgeBackend(object):
+    """
+    Subclass this and implement purge().   The GATEKEEPER_PURGE_OPTIONS setting is passed to __init__ as kwargs.
+    """
+    def __init__(self, **options):
+        self.options = options
+
+    def purge(self, tags):
+        raise NotImplementedError('subclasses of BasePurgeBackend must provide a purge() method')
+
+class LocMemPurgeBackend(BasePurgeBackend):
+    """
+    Just remembers what it was asked to purge (in self.purged, a list of lists of tags).
+    Good for tests and for local development.
+    """
+    def __init__(self, **options):
+        super(LocMemPurgeBackend, self).__init__(**options)
+        self.purged = []
+
+    def purge(self, tags):
+        self.purged.append(list(tags))
+
+class HTTPPurgeBackend(BasePurgeBackend):
+    """
+    Sends a PURGE request with the tags in a Surrogate-Key header,
+    which is what Varnish (with xkey) or a local stand-in for your CDN will want.
+
+    Options:
+        url: where to send it (required)
+        method: default 'PURGE'
+        header: default 'Surrogate-Key'
+        timeout: in seconds, default 5
+    """
+    def purge(self, tags):
+        try:
+            from urllib.request import Request, urlopen
+        except ImportError:  # Python 2
+            from urllib2 import Request, urlopen
+        request = Request(self.options['url'])
+        request.get_method = lambda: self.options.get('method', 'PURGE')
+        request.add_header(self.options.get('header', 'Surrogate-Key'), ' '.join(tags))
+        urlopen(request, timeout=self.options.get('timeout', 5)).close()
+
+_backends = {}
+_batch = threading.local()
+
+def get_purge_backend():
+    """
+    Returns the configured purge backend (one instance per configuration), or None.
+    """
+    path = getattr(settings, 'GATEKEEPER_PURGE_BACKEND', None)
+    if not path:
+        return None
+    options = getattr(settings, 'GATEKEEPER_PURGE_OPTIONS', {})
+    key = (path, repr(sorted(options.items())))
+    if key not in _backends:
+        _backends[key] = import_string(path)(**options)
+    return _backends[key]
+
+def _send(tags):
+    backend = get_purge_backend()
+    if backend is not None and tags:
+        # This runs after the commit: raising now would turn a save that worked into a 500.
+        try:
+            backend.purge(tags)
+        except Exception:
+            logger.exception('Purging %s failed', ' '.join(tags))
+
+def purge_tags(tags):
+    """
+    Purges the tags once the current transaction (if any) commits, so the CDN can't re-fetch the old page
+    before the change is visible.   Inside batched_purges() they're saved up and sent all at once.
+    """
+    if get_purge_backend() is None:
+        return
+    pending = getattr(_batch, 'tags', None)
+    if pending is not None:
+        pending.extend(t for t in tags if t not in pending)
+        return
+    tags = list(tags)
+    transaction.on_commit(lambda: _send(tags))
+
+class batched_purges(object):
+    """
+    Collects every purge inside the block into one, e.g. for an Admin action on 100 objects:
+
+        with batched_purges():
+            for item in queryset:
+                item.save()
+    """
+    def __enter__(self):
+        self.outer = getattr(_batch, 'tags', None)
+        if self.outer is None:
+            _batch.tags = []
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.outer is None:
+            tags, _batch.tags = _batch.tags, None
+            if tags:
+                purge_tags(tags)
+        return False
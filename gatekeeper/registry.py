@@ -0,0 +1,74 @@
+"""
+The gatekeeper model registry.
+
+Different gatekeeper models can do different things: serial models have default_live, some models have a
+date_modified field to break ties, some have a treat_as_standalone flag or a parent to check, some maintain a
+gatekeeper_is_live column.   Rather than finding that out on every call (by trying it and catching the exception), it's
+worked out ONCE per model when the app registry is ready (see apps.py) and looked up from here.
+
+    info = get_model_info(Article)
+    if info.is_serial:
+        ...
+"""
+
+# This is what get_appropriate_object_from_model uses to break ties between ALWAYS Available objects.
+DEFAULT_MODIFIED_FIELD = 'date_modified'
+
+_registry = {}
+
+
+class GatekeeperModelInfo(object):
+    """
+    What a gatekeeper model supports:
+        is_serial: it has a default_live field (i.e., it's a GatekeeperSerialAbstractModel)
+        modified_field: the name of its "last modified" field (or None)
+        parent_path: the name of the field that points to its gatekeeping parent (or None)
+        standalone: it has a treat_as_standalone field
+        live_flag: it maintains a gatekeeper_is_live column (i.e., it's a GatekeeperIsLiveAbstractModel)
+        effective_live: it maintains an effective_live_from column (i.e., it's a GatekeeperEffectiveLiveAbstractModel)
+    """
+    def __init__(self, model, is_serial=False, modified_field=None, parent_path=None, standalone=False,
+                 live_flag=False, effective_live=False):
+        self.model = model
+        self.is_serial = is_serial
+        self.modified_field = modified_field
+        self.parent_path = parent_path
+        self.standalone = standalone
+        self.live_flag = live_flag
+        self.effective_live = effective_live
+
+    def __repr__(self):
+        return '<GatekeeperModelInfo: %s>' % self.model._meta.label
+
+def build_model_info(model):
+    field_names = set(f.name for f in model._meta.fields)
+    modified_field = getattr(model, 'gatekeeper_modified_field', DEFAULT_MODIFIED_FIELD)
+    if modified_field not in field_names:
+        modified_field = None
+    return GatekeeperModelInfo(
+        model,
+        is_serial = 'default_live' in field_names,
+        modified_field = modified_field,
+        parent_path = getattr(model, 'parental_model_field', None),
+        standalone = 'treat_as_standalone' in field_names,
+        live_flag = bool(getattr(model, 'gatekeeper_live_flag', False)) and 'gatekeeper_is_live' in field_names,
+        effective_live = bool(getattr(model, 'gatekeeper_effective_live', False))
+            and 'effective_live_from' in field_names,
+    )
+
+def register_model(model):
+    """
+    Adds a (concrete or proxy) gatekeeper model to the registry.   Returns its GatekeeperModelInfo.
+    """
+    info = build_model_info(model)
+    _registry[model] = info
+    return info
+
+def get_model_info(model):
+    """
+    Returns the GatekeeperModelInfo for a model, or None if it isn't a gatekeeper model.
+    """
+    return _registry.get(model)
+
+def get_registered_models(include_proxies=False):
+    return [m for m in _registry if include_proxies or not m._meta.proxy]
@@ -0,0 +1,161 @@
+import copy
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Exists, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Coalesce
+
+from .registry import get_model_info
+from .view_utils import public_gate_q, view_gatekeeper
+
+"""
+Gatekeeping related objects.
+
+A template that walks show.episodes.all either shows episodes that aren't live, or has to call
+view_gatekeeper() once per show (N+1 queries).   GatekeeperPrefetch builds a Prefetch whose queryset already
+has the gate applied, so the live episodes for a whole page of shows come back in ONE extra query:
+
+    shows = prefetch_live(Show.objects.all(), 'episodes')
+    # or:
+    shows = Show.objects.prefetch_related(GatekeeperPrefetch('episodes', model=Show))
+
+    {% for show in shows %}
+        {% for episode in show.episodes.all %}   <-- only live episodes, no extra queries
+
+And for landing pages that only need to know IF (or how many) live children there are, without loading them:
+
+    shows = annotate_live_children(Show.objects.all(), 'episodes')     # show.live_episodes_count
+    shows = filter_has_live_children(Show.objects.all(), 'episodes')   # only shows with a live episode
+
+Both are done with subqueries, so the whole listing is still one SQL statement.
+"""
+
+def _is_relation_named(field, name):
+    if not field.is_relation:
+        return False
+    if field.name == name:
+        return True
+    return field.auto_created and not field.concrete and field.get_accessor_name() == name
+
+def get_relation(model, name):
+    """
+    Finds the relation on the model called `name` --- either a forward field (e.g., 'show') or the accessor of a
+    reverse relation (e.g., 'episodes', or 'episode_set' if there's no related_name).
+    """
+    for field in model._meta.get_fields():
+        if _is_relation_named(field, name):
+            return field
+    raise FieldDoesNotExist('%s has no relation named %r' % (model._meta.label, name))
+
+def get_related_model(model, lookup):
+    """
+    Follows a (possibly nested, e.g., 'seasons__episodes') relation path and returns the model at the end of it.
+    """
+    for name in lookup.split(LOOKUP_SEP):
+        model = get_relation(model, name).related_model
+    return model
+
+class GatekeeperPrefetch(Prefetch):
+    """
+    A Prefetch that only fetches related objects that pass the gate.
+
+    The gate is applied each time the prefetch runs (so a GatekeeperPrefetch can be kept around and reused).
+    If you don't pass a queryset, the related model is worked out by following the lookup from the model being
+    prefetched from:  prefetch_live() (and a gatekeeper model's .prefetch_related()) know what that is, but plain
+    .prefetch_related() doesn't say, so there you have to pass it as `model`.
+    """
+    def __init__(self, lookup, is_auth=False, queryset=None, to_attr=None, model=None):
+        self.is_auth = is_auth
+        super(GatekeeperPrefetch, self).__init__(lookup, queryset=queryset, to_attr=to_attr)
+        if model is not None and queryset is None:
+            self.queryset = get_related_model(model, self.prefetch_through)._default_manager.all()
+
+    @property
+    def is_resolved(self):
+        return self.queryset is not None
+
+    def resolve(self, model):
+        """
+        Returns a copy with the related model's queryset filled in, starting from `model`
+        (the model being prefetched from).   The GatekeeperPrefetch itself isn't changed.
+        """
+        if self.is_resolved:
+            return self
+        resolved = copy.copy(self)
+        resolved.queryset = get_related_model(model, self.prefetch_through)._default_manager.all()
+        return resolved
+
+    def get_current_queryset(self, level):
+        if self.get_current_prefetch_to(level) != self.prefetch_to:
+            return None
+        if self.queryset is None:
+            raise ValueError(
+                "GatekeeperPrefetch(%r) doesn't know which model it's prefetching from: pass it a queryset or "
+                "model=..., or use prefetch_live()." % self.prefetch_through
+            )
+        return view_gatekeeper(self.queryset, self.is_auth)
+
+def resolve_gatekeeper_prefetches(model, lookups):
+    return [
+        lookup.resolve(model) if isinstance(lookup, GatekeeperPrefetch) else lookup
+        for lookup in lookups
+    ]
+
+def prefetch_live(qs, *lookups, **kwargs):
+    """
+    Like qs.prefetch_related(*lookups), but every lookup only fetches related objects that pass the gate.
+    Lookups can be strings or (Gatekeeper)Prefetch objects.   Takes an is_auth keyword arg (default False).
+    """
+    is_auth = kwargs.pop('is_auth', False)
+    gated = []
+    for lookup in lookups:
+        if not isinstance(lookup, Prefetch):
+            lookup = GatekeeperPrefetch(lookup, is_auth=is_auth)
+        gated.append(lookup)
+    return qs.prefetch_related(*resolve_gatekeeper_prefetches(qs.model, gated))
+
+def _live_children(model, related_name, now=None):
+    """
+    The live children of the (reverse) relation, correlated to the outer queryset's rows, for use in a subquery.
+    Returns (children queryset, name of the field on the child that points back at the parent).
+    """
+    relation = get_relation(model, related_name)
+    if relation.concrete or not (relation.one_to_many or relation.many_to_many):
+        raise ValueError(
+            "%r isn't a reverse relation on %s: annotating live children needs e.g. a ForeignKey's related_name"
+            % (related_name, model._meta.label)
+        )
+    child = relation.related_model
+    if get_model_info(child) is None:
+        raise ValueError('%s is not a gatekeeper model' % child._meta.label)
+    gate = public_gate_q(child, now=now)
+    back = relation.field.name
+    target = relation.field.target_field.attname if relation.one_to_many else 'pk'
+    children = child._default_manager.filter(**{back: OuterRef(target)}).filter(gate).order_by()
+    return children, back
+
+def annotate_live_children(qs, related_name, count_as=None, exists_as=None, now=None):
+    """
+    Annotates each parent with the number of live children (count_as, default 'live_<related_name>_count')
+    and whether there are any (exists_as, default 'has_live_<related_name>').   Pass False for either to skip it.
+    """
+    children, back = _live_children(qs.model, related_name, now=now)
+    if count_as is None:
+        count_as = 'live_%s_count' % related_name
+    if exists_as is None:
+        exists_as = 'has_live_%s' % related_name
+    annotations = {}
+    if count_as:
+        counts = children.values(back).annotate(n=Count('pk')).values('n')
+        annotations[count_as] = Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+    if exists_as:
+        annotations[exists_as] = Exists(children)
+    return qs.annotate(**annotations)
+
+def filter_has_live_children(qs, related_name, now=None):
+    """
+    Only the parents that have at least one live child.   (They're also annotated with has_live_<related_name>.)
+    """
+    exists_as = 'has_live_%s' % related_name
+    qs = annotate_live_children(qs, related_name, count_as=False, exists_as=exists_as, now=now)
+    return qs.filter(**{exists_as: True})
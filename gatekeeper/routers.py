@@ -0,0 +1,106 @@
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import six
+
+from .cache import get_gatekeeper_cache, get_model_label
+
+"""
+Read-replica routing for PUBLIC gatekeeper reads.
+
+The public side of the site (anonymous users going through view_gatekeeper, the list/detail/serial mixins and
+get_appropriate_object_from_model) can be sent to a read replica, while the Admin and staff previews stay on the
+primary database.
+
+Settings:
+    GATEKEEPER_REPLICA_DB: the database alias (or a list of aliases to pick from) for public reads.
+        If it's not set, nothing is routed anywhere.
+    GATEKEEPER_REPLICA_PIN_SECONDS: after an object of a model is saved (which includes the Admin actions) or
+        transitioned, public reads of that model stay on the primary for this long (default: 5), so that
+        replication lag doesn't hide a homepage that was JUST published from the editor who published it.
+
+If you route reads to a replica, also add the router to your settings, so that objects read from a replica
+are never written back to it:
+
+    DATABASE_ROUTERS = ['gatekeeper.routers.GatekeeperReplicaRouter']
+"""
+
+PIN_KEY = 'gatekeeper:pin:%s'
+
+
+def get_replica_aliases():
+    replicas = getattr(settings, 'GATEKEEPER_REPLICA_DB', None)
+    if not replicas:
+        return []
+    if isinstance(replicas, six.string_types):
+        return [replicas]
+    return list(replicas)
+
+def get_pin_seconds():
+    return getattr(settings, 'GATEKEEPER_REPLICA_PIN_SECONDS', 5)
+
+def pin_to_primary(model, seconds=None):
+    """
+    Keep public reads for the model on the primary for a little while (read-your-writes).
+    """
+    if not get_replica_aliases():
+        return
+    if seconds is None:
+        seconds = get_pin_seconds()
+    if seconds:
+        get_gatekeeper_cache().set(PIN_KEY % get_model_label(model), True, seconds)
+
+def is_pinned_to_primary(model):
+    return bool(get_gatekeeper_cache().get(PIN_KEY % get_model_label(model)))
+
+def gatekeeper_db_for_read(model, is_auth):
+    """
+    Returns the replica alias that a gated read of the model should use,
+    or None if it should go wherever it would normally go (i.e., the primary).
+    """
+    if is_auth:
+        return None
+    replicas = get_replica_aliases()
+    if not replicas or is_pinned_to_primary(model):
+        return None
+    return random.choice(replicas)
+
+def route_gatekeeper_read(qs, is_auth):
+    """
+    Sends a gated queryset to a replica if it's a public read (and one is configured).
+
+    Only querysets that would otherwise read from the primary are moved:  one that was explicitly sent somewhere
+    with .using() (or a model that your routers keep in another database) stays where it is.
+    """
+    if qs._db is not None or qs.db != DEFAULT_DB_ALIAS:
+        return qs
+    using = gatekeeper_db_for_read(qs.model, is_auth)
+    if using is None:
+        return qs
+    return qs.using(using)
+
+class GatekeeperReplicaRouter(object):
+    """
+    Keeps writes on the primary even for instances that were read from a gatekeeper replica,
+    and keeps migrations off the replicas.
+    """
+    def db_for_read(self, model, **hints):
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in get_replica_aliases():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = set([DEFAULT_DB_ALIAS] + get_replica_aliases())
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_replica_aliases():
+            return False
+        return None
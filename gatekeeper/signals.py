@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import bump_model_version
+from .changelog import connect_change_log, is_change_log_enabled, record_transitioned
+from .purge import get_tags_for_model, purge_tags
+from .routers import pin_to_primary
+
+"""
+Signals and signal receivers for gatekeeper models.
+
+Any time an instance of a gatekeeper model is saved or deleted, its gate might have changed,
+so everything that was cached for the model is invalidated (and public reads of the model
+stay on the primary database for a moment, in case a replica hasn't caught up --- see routers.py),
+and the pages tagged with it are purged from the CDN (see purge.py).
+
+The version is bumped straight away (so the saving request doesn't read its own stale caches) and again
+when the transaction commits:  until then, other requests still see the old rows, and anything they cache
+in the meantime goes under the new version.   A save through a proxy model invalidates the concrete model
+too, since they're the same rows.
+
+Objects that go live (or dark) because of the clock don't get saved, so when the transition worker
+(see transitions.py) catches them it sends gate_transitioned instead:
+
+    gate_transitioned.send(sender=Model, pks=[...], is_live=True, now=...)
+
+(now is the time the worker checked the gate at, if it isn't right now.)
+
+If GATEKEEPER_CHANGE_LOG is on, saves, deletes and transitions are also written to the change log
+(see changelog.py).
+
+The save/delete receivers are connected to each gatekeeper model as it's registered (see apps.py),
+so saving any other model doesn't pay for them.
+"""
+
+gate_transitioned = Signal()
+
+def get_changed_models(model):
+    concrete = model._meta.concrete_model
+    return [concrete] if concrete is model else [concrete, model]
+
+def _bump(models):
+    for model in models:
+        bump_model_version(model)
+        pin_to_primary(model)
+
+def gatekeeper_models_changed(model, pks, using=None):
+    models = get_changed_models(model)
+    _bump(models)
+    transaction.on_commit(lambda: _bump(models), using=using)
+    tags = []
+    for changed in models:
+        tags.extend(t for t in get_tags_for_model(changed, pks) if t not in tags)
+    purge_tags(tags)
+
+def gatekeeper_object_changed(sender, instance, using=None, **kwargs):
+    gatekeeper_models_changed(sender, [instance.pk], using=using)
+
+def connect_gatekeeper_signals(model):
+    uid = 'gatekeeper:%s' % model._meta.label_lower
+    post_save.connect(gatekeeper_object_changed, sender=model, dispatch_uid=uid)
+    post_delete.connect(gatekeeper_object_changed, sender=model, dispatch_uid=uid)
+    if is_change_log_enabled():
+        connect_change_log(model)
+
+@receiver(gate_transitioned)
+def gatekeeper_objects_transitioned(sender, pks=(), is_live=True, now=None, **kwargs):
+    gatekeeper_models_changed(sender, pks)
+    if is_change_log_enabled():
+        record_transitioned(sender, pks, is_live, now=now)
@@ -0,0 +1,116 @@
+from django import template
+from django.template import Node, TemplateSyntaxError, VariableDoesNotExist
+
+from ..cache import (
+    gatekeeper_version as get_gatekeeper_version, get_gatekeeper_cache, get_model, get_timeout_until_transition,
+    make_gatekeeper_key
+)
+from ..view_utils import view_gatekeeper
+
+register = template.Library()
+
+"""
+Template tags for putting live gatekeeper objects into templates without paying for it on every request.
+
+    {% load gatekeeper_tags %}
+
+    {% gatekeeper_live 'news.Article' '-live_as_of' 3 as recent_articles %}
+
+    {% gatekeepercache 'news.Article' sidebar %}
+        ... anything expensive built from articles ...
+    {% endgatekeepercache %}
+
+Both are cached until the next time an object of the model goes live (so nothing shows up early)
+or until an object of the model is saved or deleted (so edits show up right away).
+Both only ever show what is live to the PUBLIC, regardless of who is logged in.
+
+For caching things yourself (e.g., with Django's own {% cache %} tag), there's the model's gate version,
+which changes whenever the model's gate might have:
+
+    {% gatekeeper_version 'news.Article' as article_version %}
+    {% cache 3600 sidebar article_version %}...{% endcache %}
+"""
+
+def _get_models(model_labels):
+    """
+    Model labels can be a single 'app_label.ModelName' or several of them separated by commas.
+    """
+    if not isinstance(model_labels, (list, tuple)):
+        model_labels = [x.strip() for x in str(model_labels).split(',') if x.strip()]
+    return [get_model(label) for label in model_labels]
+
+@register.simple_tag
+def gatekeeper_live(model_label, order='-live_as_of', limit=None):
+    """
+    Returns the (public) live objects of a gatekeeper model, in the order given, optionally limited.
+    e.g., the three most recent articles:
+
+        {% gatekeeper_live 'news.Article' '-live_as_of' 3 as recent_articles %}
+    """
+    model = get_model(model_label)
+    cache = get_gatekeeper_cache()
+    key = make_gatekeeper_key('live', [model], order, limit)
+    object_list = cache.get(key)
+    if object_list is None:
+        qs = view_gatekeeper(model._default_manager.all(), False)
+        if order:
+            qs = qs.order_by(*[x.strip() for x in order.split(',')])
+        if limit:
+            qs = qs[:int(limit)]
+        object_list = list(qs)
+        cache.set(key, object_list, get_timeout_until_transition([model]))
+    return object_list
+
+@register.simple_tag
+def gatekeeper_version(model_labels):
+    """
+    The gate version of a model (see cache.gatekeeper_version) --- or, for several comma-separated models,
+    their versions joined with dashes.
+    """
+    return '-'.join(str(get_gatekeeper_version(model)) for model in _get_models(model_labels))
+
+class GatekeeperCacheNode(Node):
+    def __init__(self, nodelist, model_labels_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.model_labels_var = model_labels_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            model_labels = self.model_labels_var.resolve(context)
+        except VariableDoesNotExist:
+            raise TemplateSyntaxError('"gatekeepercache" tag got an unknown variable: %r' % self.model_labels_var.var)
+        models = _get_models(model_labels)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+
+        cache = get_gatekeeper_cache()
+        key = make_gatekeeper_key('fragment', models, self.fragment_name, *vary_on)
+        value = cache.get(key)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, get_timeout_until_transition(models))
+        return value
+
+@register.tag('gatekeepercache')
+def do_gatekeepercache(parser, token):
+    """
+    Caches a template fragment that depends on one or more gatekeeper models.
+
+        {% gatekeepercache [model_label(s)] [fragment_name] [var1] [var2] .. %}
+            .. some expensive processing ..
+        {% endgatekeepercache %}
+
+    Unlike {% cache %} there is no timeout: the fragment expires when the next object of the model(s) goes live,
+    and is thrown away whenever an object of the model(s) is saved or deleted.
+    """
+    nodelist = parser.parse(('endgatekeepercache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError("'%r' tag requires at least 2 arguments." % tokens[0])
+    return GatekeeperCacheNode(
+        nodelist, parser.compile_filter(tokens[1]),
+        tokens[2],  # fragment_name can't be a variable.
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
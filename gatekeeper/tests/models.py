@@ -1,9 +1,34 @@
 from django.db import models
-from ..models import GatekeeperAbstractModel, GatekeeperSerialAbstractModel
+from ..models import (
+    GatekeeperAbstractModel, GatekeeperEffectiveLiveAbstractModel, GatekeeperIsLiveAbstractModel,
+    GatekeeperSerialAbstractModel
+)
 
 class GatekeeperArticleTestModel(GatekeeperAbstractModel):
     title = models.CharField(max_length=100, null=False)
     
+class GatekeeperArticleProxyTestModel(GatekeeperArticleTestModel):
+    class Meta:
+        proxy = True
+
+class GatekeeperCodeTestModel(GatekeeperAbstractModel):
+    code = models.CharField(max_length=20, primary_key=True)
+
 class GatekeeperHomepageTestModel(GatekeeperSerialAbstractModel):
     title = models.CharField(max_length=100, null=False)
     
+class GatekeeperIsLiveTestModel(GatekeeperIsLiveAbstractModel, GatekeeperAbstractModel):
+    title = models.CharField(max_length=100, null=False)
+
+class GatekeeperShowTestModel(models.Model):
+    title = models.CharField(max_length=100, null=False)
+
+class GatekeeperEpisodeTestModel(GatekeeperAbstractModel):
+    show = models.ForeignKey(GatekeeperShowTestModel, related_name='episodes', on_delete=models.CASCADE)
+    title = models.CharField(max_length=100, null=False)
+
+class GatekeeperEffectiveLiveTestModel(GatekeeperEffectiveLiveAbstractModel, GatekeeperAbstractModel):
+    title = models.CharField(max_length=100, null=False)
+
+class GatekeeperEffectiveLiveHomepageTestModel(GatekeeperEffectiveLiveAbstractModel, GatekeeperSerialAbstractModel):
+    title = models.CharField(max_length=100, null=False)
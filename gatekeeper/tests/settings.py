@@ -26,9 +26,23 @@ MIDDLEWARE = MIDDLEWARE_CLASSES
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-    }
+    },
+    # Only used to test read-replica routing: it's the same database as 'default'.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+    # ... and a database that the gatekeeper mustn't move querysets off.
+    'other': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+# The test models live in the gatekeeper app (without migrations), so build the tables straight from the models.
+MIGRATION_MODULES = {'gatekeeper': None}
+
+GATEKEEPER_CHANGE_LOG = True
 
 MEDIA_URL = '/media/'
 STATIC_URL = '/static/'
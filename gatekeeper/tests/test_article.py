@@ -5,8 +5,14 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from django.test import TestCase
 import pytz
+import unittest
 
-from gatekeeper.utils import can_object_page_be_shown_to_pubilc, can_object_page_be_shown
+from gatekeeper.utils import can_object_page_be_shown_to_pubilc, can_object_page_be_shown, evaluate_gate_bulk
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 
@@ -104,4 +110,58 @@ class GatekeeperArticleTest(TestCase):
         
     ### Admin actions
     # Do I need to test this?  the code is really in the Django Admin
-        
\ No newline at end of file
+        
+
+
+class GatekeeperBulkGateTest(TestCase):
+    """
+    evaluate_gate_bulk() has to agree with can_object_page_be_shown(), object by object.
+    """
+    def setUp(self):
+        self.now = datetime.now(pytz.utc)
+        self.statuses = [0, 0, 0, 1, -1, 1, -1, 0]
+        self.live_as_ofs = [
+            None, self.now + timedelta(days=7), self.now - timedelta(days=7), self.now - timedelta(days=15),
+            self.now - timedelta(days=15), None, None, self.now,
+        ]
+        self.articles = [
+            GatekeeperArticleTestModel(title='Bulk %d' % i, publish_status=status, live_as_of=live_as_of)
+            for i, (status, live_as_of) in enumerate(zip(self.statuses, self.live_as_ofs))
+        ]
+        self.staff = User(username='bulk', is_staff=True)
+
+    def test_public_matches_per_object(self):
+        expected = [can_object_page_be_shown_to_pubilc(a) for a in self.articles]
+        self.assertEqual(evaluate_gate_bulk(self.statuses, self.live_as_ofs, False, at=self.now), expected)
+        self.assertEqual(expected, [False, False, True, True, False, True, False, True])
+
+    def test_staff_matches_per_object(self):
+        expected = [can_object_page_be_shown(self.staff, a) for a in self.articles]
+        self.assertEqual(evaluate_gate_bulk(self.statuses, self.live_as_ofs, True), expected)
+
+    def test_uses_one_time(self):
+        earlier = self.now - timedelta(days=10)
+        self.assertEqual(
+            evaluate_gate_bulk(self.statuses, self.live_as_ofs, False, at=earlier),
+            [False, False, False, True, False, True, False, False]
+        )
+
+    def test_lengths_must_match(self):
+        with self.assertRaises(ValueError):
+            evaluate_gate_bulk([0, 1], [None], False)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_matches_python(self):
+        for is_auth in (False, True):
+            expected = evaluate_gate_bulk(self.statuses, self.live_as_ofs, is_auth, at=self.now)
+            result = evaluate_gate_bulk(self.statuses, self.live_as_ofs, is_auth, at=self.now, use_numpy=True)
+            self.assertIsInstance(result, numpy.ndarray)
+            self.assertEqual(result.tolist(), expected)
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numpy_datetime64(self):
+        live_as_ofs = numpy.array([
+            'NaT' if d is None else d.astimezone(pytz.utc).replace(tzinfo=None).isoformat() for d in self.live_as_ofs
+        ], dtype='datetime64[us]')
+        result = evaluate_gate_bulk(numpy.array(self.statuses), live_as_ofs, False, at=self.now)
+        self.assertEqual(result.tolist(), [False, False, True, True, False, True, False, True])
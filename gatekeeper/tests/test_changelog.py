@@ -0,0 +1,101 @@
+from .models import GatekeeperArticleTestModel, GatekeeperIsLiveTestModel
+from datetime import datetime, timedelta
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ModelState, ProjectState
+from django.test import TestCase, TransactionTestCase, override_settings
+import pytz
+
+from gatekeeper.admin import GatekeeperGenericAdmin
+from gatekeeper.changelog import changes_since
+from gatekeeper.models import GatekeeperChange
+from gatekeeper.transitions import process_scheduled_transitions, process_transitions
+
+
+class GatekeeperChangeLogTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def get_changes(self, cursor=None, **kwargs):
+        return [(c.object_pk, c.old_state, c.new_state) for c in changes_since(cursor, **kwargs)]
+
+    def test_saves_and_deletes(self):
+        article = GatekeeperArticleTestModel.objects.create(pk=1, title='Draft')
+        article.title = 'Still a draft'
+        article.save()
+        article = GatekeeperArticleTestModel.objects.get(pk=1)
+        article.publish_status = 1
+        article.save()
+        article.delete()
+        self.assertEqual(self.get_changes(), [
+            ('1', '', 'draft'),
+            ('1', 'draft', 'always'),
+            ('1', 'always', ''),
+        ])
+
+    def test_cursor(self):
+        GatekeeperArticleTestModel.objects.create(pk=1, title='One')
+        cursor = GatekeeperChange.objects.last().id
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Two', publish_status=1)
+        GatekeeperIsLiveTestModel.objects.create(pk=3, title='Three', publish_status=1)
+        self.assertEqual(self.get_changes(cursor, chunk_size=1), [('2', '', 'always'), ('3', '', 'always')])
+        self.assertEqual(self.get_changes(models=[GatekeeperIsLiveTestModel]), [('3', '', 'always')])
+
+    def test_scheduled_transitions(self):
+        now = datetime.now(pytz.utc)
+        went_live = now - timedelta(minutes=5)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Scheduled', live_as_of=now + timedelta(minutes=5))
+        GatekeeperArticleTestModel.objects.filter(pk=1).update(live_as_of=went_live)
+        cursor = GatekeeperChange.objects.last().id
+
+        process_scheduled_transitions(GatekeeperArticleTestModel, now=now)
+        change = list(changes_since(cursor))[0]
+        self.assertEqual((change.object_pk, change.old_state, change.new_state), ('1', 'scheduled', 'live'))
+        self.assertEqual(change.effective_at, went_live)
+
+    def test_is_live_transitions(self):
+        now = datetime.now(pytz.utc)
+        GatekeeperIsLiveTestModel.objects.create(pk=1, title='Scheduled', live_as_of=now + timedelta(minutes=5))
+        GatekeeperIsLiveTestModel.objects.create(pk=2, title='Live', live_as_of=now - timedelta(minutes=5))
+        cursor = GatekeeperChange.objects.last().id
+        GatekeeperIsLiveTestModel.objects.filter(pk=2).update(publish_status=-1)
+
+        process_transitions(GatekeeperIsLiveTestModel, now=now + timedelta(minutes=10))
+        self.assertEqual(self.get_changes(cursor), [('1', 'scheduled', 'live'), ('2', 'live', 'offline')])
+
+    def test_saved_then_transitioned(self):
+        # "Take online now" logs draft -> live when it saves...
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Draft')
+        admin = GatekeeperGenericAdmin(GatekeeperArticleTestModel, AdminSite())
+        admin.gatekeeper_take_online_now(None, GatekeeperArticleTestModel.objects.all())
+        # ... so the worker, which sees its live_as_of go by, has nothing to add.
+        process_scheduled_transitions(GatekeeperArticleTestModel, now=datetime.now(pytz.utc) + timedelta(seconds=1))
+        self.assertEqual(self.get_changes(), [('1', '', 'draft'), ('1', 'draft', 'live')])
+
+
+# The test settings build the tables straight from the models, so check the real migration separately.
+@override_settings(MIGRATION_MODULES={})
+class GatekeeperChangeMigrationTest(TransactionTestCase):
+
+    def test_migration_matches_the_model(self):
+        # Like `makemigrations gatekeeper --check`, but only for the app's own models (not the test models).
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        to_state = ProjectState()
+        to_state.add_model(ModelState.from_model(GatekeeperChange))
+        changes = MigrationAutodetector(loader.project_state(), to_state).changes(
+            graph=loader.graph, trim_to_apps={'gatekeeper'}
+        )
+        self.assertEqual(changes, {})
+
+    def test_migration_runs(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(GatekeeperChange)
+        executor = MigrationExecutor(connection)
+        executor.migrate([('gatekeeper', '0001_initial')])
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Draft')
+        self.assertEqual(GatekeeperChange.objects.get().new_state, 'draft')
@@ -0,0 +1,71 @@
+from .models import GatekeeperEffectiveLiveHomepageTestModel, GatekeeperEffectiveLiveTestModel
+from datetime import datetime, timedelta
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils.six import StringIO
+import pytz
+
+from gatekeeper.registry import get_model_info
+from gatekeeper.utils import ALWAYS_LIVE_FROM, get_appropriate_object_from_model
+from gatekeeper.view_utils import view_gatekeeper
+
+
+class GatekeeperEffectiveLiveTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = now = datetime.now(pytz.utc)
+        cls.live = GatekeeperEffectiveLiveTestModel.objects.create(pk=1, title='Live',
+            live_as_of=now - timedelta(days=1))
+        cls.future = GatekeeperEffectiveLiveTestModel.objects.create(pk=2, title='Future',
+            live_as_of=now + timedelta(days=1))
+        cls.draft = GatekeeperEffectiveLiveTestModel.objects.create(pk=3, title='Draft')
+        cls.always = GatekeeperEffectiveLiveTestModel.objects.create(pk=4, title='Always', publish_status=1)
+        cls.offline = GatekeeperEffectiveLiveTestModel.objects.create(pk=5, title='Offline', publish_status=-1,
+            live_as_of=now - timedelta(days=1))
+
+    def test_registered(self):
+        self.assertTrue(get_model_info(GatekeeperEffectiveLiveTestModel).effective_live)
+
+    def test_maintained_on_save(self):
+        self.assertEqual(self.live.effective_live_from, self.live.live_as_of)
+        self.assertEqual(self.future.effective_live_from, self.future.live_as_of)
+        self.assertIsNone(self.draft.effective_live_from)
+        self.assertEqual(self.always.effective_live_from, ALWAYS_LIVE_FROM)
+        self.assertIsNone(self.offline.effective_live_from)
+
+        self.draft.publish_status = 1
+        self.draft.save(update_fields=['publish_status'])
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.effective_live_from, ALWAYS_LIVE_FROM)
+
+    def test_public_filter_is_one_range(self):
+        qs = view_gatekeeper(GatekeeperEffectiveLiveTestModel.objects.all(), False)
+        self.assertEqual(sorted(qs.values_list('pk', flat=True)), [1, 4])
+        self.assertNotIn('publish_status" <', str(qs.query))
+        self.assertNotIn('"live_as_of"', str(qs.query).split('WHERE')[1])
+
+    def test_serial_rule_2(self):
+        GatekeeperEffectiveLiveHomepageTestModel.objects.create(pk=1, title='Always', publish_status=1)
+        self.assertEqual(get_appropriate_object_from_model(GatekeeperEffectiveLiveHomepageTestModel).pk, 1)
+        GatekeeperEffectiveLiveHomepageTestModel.objects.create(pk=2, title='Older',
+            live_as_of=self.now - timedelta(days=2))
+        GatekeeperEffectiveLiveHomepageTestModel.objects.create(pk=3, title='Newer',
+            live_as_of=self.now - timedelta(days=1))
+        GatekeeperEffectiveLiveHomepageTestModel.objects.create(pk=4, title='Future',
+            live_as_of=self.now + timedelta(days=1))
+        self.assertEqual(get_appropriate_object_from_model(GatekeeperEffectiveLiveHomepageTestModel).pk, 3)
+
+    def test_backfill_command(self):
+        GatekeeperEffectiveLiveTestModel.objects.update(effective_live_from=None)
+        out = StringIO()
+        call_command('gatekeeper_backfill', 'gatekeeper.GatekeeperEffectiveLiveTestModel', batch_size=2, stdout=out)
+        self.assertIn('5 rows', out.getvalue())
+        values = dict(GatekeeperEffectiveLiveTestModel.objects.values_list('pk', 'effective_live_from'))
+        self.assertEqual(values, {1: self.live.live_as_of, 2: self.future.live_as_of, 3: None,
+            4: ALWAYS_LIVE_FROM, 5: None})
+
+    def test_backfill_command_rejects_other_models(self):
+        with self.assertRaises(CommandError):
+            call_command('gatekeeper_backfill', 'gatekeeper.GatekeeperArticleTestModel', stdout=StringIO())
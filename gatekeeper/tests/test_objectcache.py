@@ -0,0 +1,117 @@
+from .models import GatekeeperArticleTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.db.models.signals import post_init
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+import pytz
+import time
+
+from gatekeeper.cache import bump_model_version
+from gatekeeper.objectcache import (
+    LocalLRUCache, clear_local_object_cache, get_not_live_expiry, get_object_expiry
+)
+
+
+class LocalLRUCacheTest(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(max_entries=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        self.assertEqual(len(lru), 2)
+
+
+class ObjectCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Live', live_as_of=now - timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Future', live_as_of=now + timedelta(minutes=10))
+        GatekeeperArticleTestModel.objects.create(pk=3, title='Offline', live_as_of=now - timedelta(days=1),
+            publish_status=-1)
+
+    def setUp(self):
+        cache.clear()
+        clear_local_object_cache()
+
+    def get(self, pk):
+        return self.client.get(reverse('article-cached-detail', args=(pk,)))
+
+    def test_cached_lookup(self):
+        self.assertContains(self.get(1), '1:Live')
+        with self.assertNumQueries(0):
+            self.assertContains(self.get(1), '1:Live')
+
+    def test_shared_cache_fills_local_cache(self):
+        self.get(1)
+        # Another process would only have the shared (L2) cache.
+        clear_local_object_cache()
+        with self.assertNumQueries(0):
+            self.assertContains(self.get(1), '1:Live')
+
+    def test_save_invalidates(self):
+        self.get(1)
+        article = GatekeeperArticleTestModel.objects.get(pk=1)
+        article.title = 'Changed'
+        article.save()
+        self.assertContains(self.get(1), '1:Changed')
+
+    def save_while_reading(self, pk, **changes):
+        """
+        The next time the article is read from the database, it's changed (and its version bumped) right after
+        the read --- i.e., before the view can store what it read.
+        """
+        def saved_meanwhile(sender, instance, **kwargs):
+            post_init.disconnect(saved_meanwhile, sender=GatekeeperArticleTestModel)
+            GatekeeperArticleTestModel.objects.filter(pk=pk).update(**changes)
+            bump_model_version(GatekeeperArticleTestModel)
+        post_init.connect(saved_meanwhile, sender=GatekeeperArticleTestModel, weak=False)
+        self.addCleanup(post_init.disconnect, saved_meanwhile, sender=GatekeeperArticleTestModel)
+
+    def test_save_during_read_is_not_cached_as_current(self):
+        self.save_while_reading(1, title='New')
+        self.assertContains(self.get(1), '1:Live')
+        self.assertContains(self.get(1), '1:New')
+
+    def test_publish_during_read_is_not_remembered_as_404(self):
+        self.save_while_reading(3, publish_status=1)
+        self.assertEqual(self.get(3).status_code, 404)
+        self.assertContains(self.get(3), '3:Offline')
+
+    def test_not_live(self):
+        self.assertEqual(self.get(2).status_code, 404)
+        self.assertEqual(self.get(99).status_code, 404)
+
+    def test_expiry_at_transition(self):
+        future = GatekeeperArticleTestModel.objects.get(pk=2)
+        self.assertAlmostEqual(get_object_expiry(future), time.time() + 600, delta=5)
+        live = GatekeeperArticleTestModel.objects.get(pk=1)
+        with self.settings(GATEKEEPER_CACHE_TIMEOUT=60):
+            self.assertAlmostEqual(get_object_expiry(live), time.time() + 60, delta=5)
+
+    def test_not_live_is_remembered(self):
+        self.assertEqual(self.get(2).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(2).status_code, 404)
+
+    def test_not_live_until_saved(self):
+        self.assertEqual(self.get(3).status_code, 404)
+        article = GatekeeperArticleTestModel.objects.get(pk=3)
+        article.publish_status = 1
+        article.save()
+        self.assertContains(self.get(3), '3:Offline')
+
+    def test_not_live_expiry(self):
+        future = GatekeeperArticleTestModel.objects.get(pk=2)
+        self.assertAlmostEqual(get_not_live_expiry(future), time.time() + 600, delta=5)
+        # Drafts and offline objects are only remembered for GATEKEEPER_NOT_LIVE_TIMEOUT.
+        offline = GatekeeperArticleTestModel.objects.get(pk=3)
+        self.assertAlmostEqual(get_not_live_expiry(offline), time.time() + 3600, delta=5)
+        with self.settings(GATEKEEPER_NOT_LIVE_TIMEOUT=60):
+            self.assertAlmostEqual(get_not_live_expiry(offline), time.time() + 60, delta=5)
+            self.assertAlmostEqual(get_not_live_expiry(future), time.time() + 60, delta=5)
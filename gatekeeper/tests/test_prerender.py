@@ -0,0 +1,111 @@
+from .models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.transaction import TransactionManagementError
+from django.test import TestCase, TransactionTestCase
+from io import StringIO
+import os
+import pytz
+import shutil
+import tempfile
+
+from gatekeeper.objectcache import clear_local_object_cache
+from gatekeeper.prerender import MANIFEST_NAME, prerender
+
+VIEWS = [
+    ('article-detail', 'gatekeeper.GatekeeperArticleTestModel'),
+    ('homepage-live', 'gatekeeper.GatekeeperHomepageTestModel'),
+]
+
+
+def create_test_data():
+    now = datetime.now(pytz.utc)
+    GatekeeperArticleTestModel.objects.create(pk=1, title='Pending')
+    GatekeeperArticleTestModel.objects.create(pk=2, title='Live', live_as_of=now - timedelta(days=1))
+    GatekeeperArticleTestModel.objects.create(pk=3, title='Always', publish_status=1)
+    GatekeeperHomepageTestModel.objects.create(pk=1, title='Current', live_as_of=now - timedelta(days=1))
+
+
+class PrerenderTestMixin(object):
+
+    def setUp(self):
+        cache.clear()
+        clear_local_object_cache()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def read(self, path):
+        with open(os.path.join(self.root, path, 'index.html')) as f:
+            return f.read().strip()
+
+    def exists(self, path):
+        return os.path.exists(os.path.join(self.root, path, 'index.html'))
+
+    def run_prerender(self, **kwargs):
+        kwargs.setdefault('processes', 1)
+        return prerender(VIEWS, root=self.root, chunk_size=1, **kwargs)
+
+
+class GatekeeperPrerenderTest(PrerenderTestMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_test_data()
+
+    def test_renders_live_pages(self):
+        results = self.run_prerender()
+        self.assertEqual(sorted(results['rendered']), ['/articles/2/', '/articles/3/', '/homepage/'])
+        self.assertEqual(self.read('articles/2'), '2:Live')
+        self.assertEqual(self.read('homepage'), '1:Current')
+        self.assertFalse(self.exists('articles/1'))
+        self.assertTrue(os.path.exists(os.path.join(self.root, MANIFEST_NAME)))
+
+    def test_process_pool_in_a_transaction(self):
+        # TestCase wraps every test in a transaction.
+        with self.assertRaises(TransactionManagementError):
+            self.run_prerender(processes=2)
+        self.assertEqual(GatekeeperArticleTestModel.objects.count(), 3)
+
+    def test_incremental(self):
+        self.run_prerender()
+        article = GatekeeperArticleTestModel.objects.get(pk=1)
+        article.publish_status = 1
+        article.save()
+        GatekeeperArticleTestModel.objects.filter(pk=2).update(publish_status=-1)
+
+        results = self.run_prerender(incremental=True)
+        self.assertEqual(results['rendered'], ['/articles/1/'])
+        self.assertEqual(sorted(results['skipped']), ['/articles/3/', '/homepage/'])
+        self.assertEqual(results['removed'], ['/articles/2/'])
+        self.assertEqual(self.read('articles/1'), '1:Pending')
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'articles', '2')))
+
+    def test_command(self):
+        out = StringIO()
+        call_command('gatekeeper_prerender', 'article-detail=gatekeeper.GatekeeperArticleTestModel',
+            root=self.root, processes=1, stdout=out)
+        self.assertIn('2 rendered', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('gatekeeper_prerender', 'homepage-live=gatekeeper.GatekeeperShowTestModel',
+                root=self.root, processes=1, stdout=StringIO())
+
+
+class GatekeeperPrerenderPoolTest(PrerenderTestMixin, TransactionTestCase):
+    """
+    The pool closes the database connections before it forks, so this can't run inside a TestCase transaction.
+    """
+
+    def setUp(self):
+        super(GatekeeperPrerenderPoolTest, self).setUp()
+        create_test_data()
+
+    def test_process_pool(self):
+        # The forked workers get a copy of the (in-memory) test database.
+        results = self.run_prerender(processes=2)
+        self.assertEqual(sorted(results['rendered']), ['/articles/2/', '/articles/3/', '/homepage/'])
+        self.assertEqual(results['failed'], [])
+        self.assertEqual(self.read('articles/3'), '3:Always')
+        # ... and the parent can carry on using its own connection.
+        self.assertEqual(GatekeeperArticleTestModel.objects.count(), 3)
@@ -0,0 +1,126 @@
+from .models import GatekeeperArticleProxyTestModel, GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+from datetime import datetime, timedelta
+from django.contrib.admin.sites import AdminSite
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+import pytz
+
+from gatekeeper.admin import GatekeeperGenericAdmin
+from gatekeeper.cache import get_model_version
+from gatekeeper.purge import BasePurgeBackend, get_purge_backend
+from gatekeeper.transitions import process_scheduled_transitions
+
+from .views import ArticleListView
+
+
+class BrokenPurgeBackend(BasePurgeBackend):
+    def purge(self, tags):
+        raise IOError('the CDN is down')
+
+
+class GatekeeperSurrogateKeyTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Live', live_as_of=now - timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Also live', publish_status=1)
+        GatekeeperHomepageTestModel.objects.create(pk=3, title='Homepage', live_as_of=now - timedelta(days=1))
+
+    def test_list_is_tagged(self):
+        response = self.client.get('/articles/')
+        keys = response['Surrogate-Key'].split(' ')
+        self.assertEqual(keys[0], 'gatekeeper.gatekeeperarticletestmodel')
+        self.assertEqual(sorted(keys[1:]), ['gatekeeper.gatekeeperarticletestmodel:1',
+            'gatekeeper.gatekeeperarticletestmodel:2'])
+        self.assertEqual(response['Cache-Tag'], ','.join(keys))
+
+    def test_detail_and_serial_are_tagged(self):
+        response = self.client.get('/articles/1/')
+        self.assertEqual(response['Surrogate-Key'],
+            'gatekeeper.gatekeeperarticletestmodel gatekeeper.gatekeeperarticletestmodel:1')
+        response = self.client.get('/homepage/')
+        self.assertEqual(response['Surrogate-Key'], 'gatekeeper.gatekeeperhomepagetestmodel '
+            'serial:gatekeeper.gatekeeperhomepagetestmodel gatekeeper.gatekeeperhomepagetestmodel:3')
+
+    def test_long_lists_only_get_the_model_tag(self):
+        ArticleListView.surrogate_key_limit = 1
+        try:
+            response = self.client.get('/articles/')
+        finally:
+            del ArticleListView.surrogate_key_limit
+        self.assertEqual(response['Surrogate-Key'], 'gatekeeper.gatekeeperarticletestmodel')
+
+    @override_settings(GATEKEEPER_SURROGATE_KEY_HEADERS=())
+    def test_tagging_can_be_turned_off(self):
+        self.assertFalse(self.client.get('/articles/').has_header('Surrogate-Key'))
+
+
+@override_settings(GATEKEEPER_PURGE_BACKEND='gatekeeper.purge.LocMemPurgeBackend')
+class GatekeeperPurgeTest(TransactionTestCase):
+    """
+    Purges are sent when the transaction commits, so this can't run inside a TestCase transaction.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.now = datetime.now(pytz.utc)
+        self.article = GatekeeperArticleTestModel.objects.create(pk=1, title='Pending')
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Soon', live_as_of=self.now + timedelta(minutes=5))
+        self.backend = get_purge_backend()
+        self.backend.purged = []
+
+    def test_save_purges(self):
+        self.article.publish_status = 1
+        self.article.save()
+        self.assertEqual(self.backend.purged, [
+            ['gatekeeper.gatekeeperarticletestmodel', 'gatekeeper.gatekeeperarticletestmodel:1']
+        ])
+
+    def test_admin_action_purges_once(self):
+        admin = GatekeeperGenericAdmin(GatekeeperArticleTestModel, AdminSite())
+        admin.gatekeeper_take_online_now(None, GatekeeperArticleTestModel.objects.all())
+        self.assertEqual(len(self.backend.purged), 1)
+        self.assertEqual(sorted(self.backend.purged[0]), [
+            'gatekeeper.gatekeeperarticletestmodel',
+            'gatekeeper.gatekeeperarticletestmodel:1',
+            'gatekeeper.gatekeeperarticletestmodel:2',
+        ])
+
+    def test_scheduled_transition_purges(self):
+        self.assertEqual(process_scheduled_transitions(GatekeeperArticleTestModel, now=self.now), 0)
+        later = self.now + timedelta(minutes=10)
+        self.assertEqual(process_scheduled_transitions(GatekeeperArticleTestModel, now=later), 1)
+        # ... and only once.
+        self.assertEqual(process_scheduled_transitions(GatekeeperArticleTestModel, now=later), 0)
+        self.assertEqual(self.backend.purged, [
+            ['gatekeeper.gatekeeperarticletestmodel', 'gatekeeper.gatekeeperarticletestmodel:2']
+        ])
+
+    @override_settings(GATEKEEPER_PURGE_BACKEND='gatekeeper.tests.test_purge.BrokenPurgeBackend')
+    def test_failed_purge_does_not_break_the_save(self):
+        self.article.publish_status = 1
+        with self.assertLogs('gatekeeper.purge', 'ERROR'):
+            self.article.save()
+        self.assertEqual(GatekeeperArticleTestModel.objects.get(pk=1).publish_status, 1)
+
+    def test_proxy_save_invalidates_the_concrete_model(self):
+        version = get_model_version(GatekeeperArticleTestModel)
+        article = GatekeeperArticleProxyTestModel.objects.get(pk=1)
+        article.publish_status = 1
+        article.save()
+        self.assertGreater(get_model_version(GatekeeperArticleTestModel), version)
+        self.assertEqual(self.backend.purged, [[
+            'gatekeeper.gatekeeperarticletestmodel', 'gatekeeper.gatekeeperarticletestmodel:1',
+            'gatekeeper.gatekeeperarticleproxytestmodel', 'gatekeeper.gatekeeperarticleproxytestmodel:1',
+        ]])
+
+    def test_version_is_bumped_again_on_commit(self):
+        with transaction.atomic():
+            self.article.publish_status = 1
+            self.article.save()
+            # Another request could cache the old row under this version before the commit...
+            during = get_model_version(GatekeeperArticleTestModel)
+        # ... so it mustn't be the current one afterwards.
+        self.assertGreater(get_model_version(GatekeeperArticleTestModel), during)
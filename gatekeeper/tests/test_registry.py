@@ -0,0 +1,23 @@
+from .models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel, GatekeeperIsLiveTestModel
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+
+from gatekeeper.registry import get_model_info, get_registered_models
+
+
+class GatekeeperRegistryTest(SimpleTestCase):
+
+    def test_registered(self):
+        models = get_registered_models()
+        for model in (GatekeeperArticleTestModel, GatekeeperHomepageTestModel, GatekeeperIsLiveTestModel):
+            self.assertIn(model, models)
+        self.assertIsNone(get_model_info(User))
+
+    def test_capabilities(self):
+        article = get_model_info(GatekeeperArticleTestModel)
+        self.assertFalse(article.is_serial)
+        self.assertFalse(article.live_flag)
+        self.assertFalse(article.standalone)
+        self.assertIsNone(article.modified_field)
+        self.assertTrue(get_model_info(GatekeeperHomepageTestModel).is_serial)
+        self.assertTrue(get_model_info(GatekeeperIsLiveTestModel).live_flag)
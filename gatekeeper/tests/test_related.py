@@ -0,0 +1,83 @@
+from .models import GatekeeperEpisodeTestModel, GatekeeperShowTestModel
+from datetime import datetime, timedelta
+from django.test import TestCase
+import pytz
+
+from gatekeeper.related import (
+    GatekeeperPrefetch, annotate_live_children, filter_has_live_children, prefetch_live
+)
+
+
+class GatekeeperRelatedTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        cls.show1 = GatekeeperShowTestModel.objects.create(pk=1, title='Show 1')
+        cls.show2 = GatekeeperShowTestModel.objects.create(pk=2, title='Show 2')
+        cls.show3 = GatekeeperShowTestModel.objects.create(pk=3, title='Show 3')
+        GatekeeperEpisodeTestModel.objects.create(pk=1, show=cls.show1, title='Live',
+            live_as_of=now - timedelta(days=1))
+        GatekeeperEpisodeTestModel.objects.create(pk=2, show=cls.show1, title='Pending')
+        GatekeeperEpisodeTestModel.objects.create(pk=3, show=cls.show1, title='Always', publish_status=1)
+        GatekeeperEpisodeTestModel.objects.create(pk=4, show=cls.show2, title='Future',
+            live_as_of=now + timedelta(days=1))
+        GatekeeperEpisodeTestModel.objects.create(pk=5, show=cls.show3, title='Offline', publish_status=-1,
+            live_as_of=now - timedelta(days=1))
+
+    def episodes_by_show(self, shows):
+        return dict((show.pk, sorted(e.pk for e in show.episodes.all())) for show in shows)
+
+    def test_prefetch_live(self):
+        with self.assertNumQueries(2):
+            shows = list(prefetch_live(GatekeeperShowTestModel.objects.order_by('pk'), 'episodes'))
+            self.assertEqual(self.episodes_by_show(shows), {1: [1, 3], 2: [], 3: []})
+
+    def test_prefetch_for_admin(self):
+        shows = prefetch_live(GatekeeperShowTestModel.objects.all(), 'episodes', is_auth=True)
+        self.assertEqual(self.episodes_by_show(shows), {1: [1, 2, 3], 2: [4], 3: [5]})
+
+    def test_prefetch_with_queryset_and_to_attr(self):
+        shows = GatekeeperShowTestModel.objects.prefetch_related(GatekeeperPrefetch(
+            'episodes', queryset=GatekeeperEpisodeTestModel.objects.order_by('-pk'), to_attr='live_episodes'
+        ))
+        self.assertEqual([e.pk for e in shows.get(pk=1).live_episodes], [3, 1])
+
+    def test_prefetch_from_a_gatekeeper_model(self):
+        episodes = GatekeeperEpisodeTestModel.objects.filter(pk=1).prefetch_related(
+            GatekeeperPrefetch('show__episodes', to_attr='live_siblings')
+        )
+        self.assertEqual(sorted(e.pk for e in episodes[0].show.live_siblings), [1, 3])
+
+    def test_prefetch_related_on_a_plain_model(self):
+        # Show isn't a gatekeeper model, so its .prefetch_related() has to be told where 'episodes' start from.
+        with self.assertNumQueries(2):
+            shows = list(GatekeeperShowTestModel.objects.order_by('pk').prefetch_related(
+                GatekeeperPrefetch('episodes', model=GatekeeperShowTestModel)
+            ))
+            self.assertEqual(self.episodes_by_show(shows), {1: [1, 3], 2: [], 3: []})
+
+    def test_unresolved_prefetch_is_an_error(self):
+        with self.assertRaises(ValueError):
+            list(GatekeeperShowTestModel.objects.prefetch_related(GatekeeperPrefetch('episodes')))
+
+    def test_shared_prefetch_is_not_changed(self):
+        prefetch = GatekeeperPrefetch('episodes')
+        for i in range(2):
+            shows = prefetch_live(GatekeeperShowTestModel.objects.all(), prefetch)
+            self.assertEqual(self.episodes_by_show(shows), {1: [1, 3], 2: [], 3: []})
+        self.assertIsNone(prefetch.queryset)
+
+    def test_annotate_live_children(self):
+        with self.assertNumQueries(1):
+            shows = list(annotate_live_children(GatekeeperShowTestModel.objects.order_by('pk'), 'episodes'))
+        self.assertEqual([s.live_episodes_count for s in shows], [2, 0, 0])
+        self.assertEqual([s.has_live_episodes for s in shows], [True, False, False])
+
+    def test_filter_has_live_children(self):
+        shows = filter_has_live_children(GatekeeperShowTestModel.objects.all(), 'episodes')
+        self.assertEqual([s.pk for s in shows], [1])
+
+    def test_annotate_forward_relation(self):
+        with self.assertRaises(ValueError):
+            annotate_live_children(GatekeeperEpisodeTestModel.objects.all(), 'show')
@@ -0,0 +1,56 @@
+from .models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+import pytz
+
+from gatekeeper.routers import GatekeeperReplicaRouter, pin_to_primary
+from gatekeeper.utils import get_appropriate_object_from_model
+from gatekeeper.view_utils import view_gatekeeper
+
+
+@override_settings(GATEKEEPER_REPLICA_DB='replica')
+class GatekeeperReplicaRoutingTest(TransactionTestCase):
+    """
+    The 'replica' is a mirror of 'default', so this has to commit (a TestCase transaction would lock it out).
+    """
+    multi_db = True
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        now = datetime.now(pytz.utc)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Live', live_as_of=now - timedelta(days=1))
+        GatekeeperHomepageTestModel.objects.create(pk=1, title='Homepage', live_as_of=now - timedelta(days=1))
+        cache.clear()
+
+    def test_public_reads_go_to_the_replica(self):
+        qs = GatekeeperArticleTestModel.objects.all()
+        self.assertEqual(view_gatekeeper(qs, False).db, 'replica')
+        self.assertEqual(view_gatekeeper(qs, True).db, 'default')
+
+    def test_explicit_database_is_kept(self):
+        qs = GatekeeperArticleTestModel.objects.using('other')
+        self.assertEqual(view_gatekeeper(qs, False).db, 'other')
+        qs = GatekeeperArticleTestModel.objects.using('default')
+        self.assertEqual(view_gatekeeper(qs, False).db, 'default')
+
+    def test_pinned_after_save(self):
+        GatekeeperArticleTestModel.objects.get(pk=1).save()
+        qs = GatekeeperArticleTestModel.objects.all()
+        self.assertEqual(view_gatekeeper(qs, False).db, 'default')
+        cache.clear()
+        self.assertEqual(view_gatekeeper(qs, False).db, 'replica')
+
+    def test_views(self):
+        response = self.client.get('/articles/1/')
+        self.assertEqual(response.context['article']._state.db, 'replica')
+        response = self.client.get('/homepage/')
+        self.assertEqual(response.context['homepage']._state.db, 'replica')
+        pin_to_primary(GatekeeperHomepageTestModel)
+        response = self.client.get('/homepage/')
+        self.assertEqual(response.context['homepage']._state.db, 'default')
+
+    def test_writes_stay_on_the_primary(self):
+        obj = get_appropriate_object_from_model(GatekeeperHomepageTestModel, using='replica')
+        self.assertEqual(GatekeeperReplicaRouter().db_for_write(GatekeeperHomepageTestModel, instance=obj), 'default')
+        self.assertFalse(GatekeeperReplicaRouter().allow_migrate('replica', 'gatekeeper'))
@@ -0,0 +1,66 @@
+from .models import GatekeeperArticleTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+import pytz
+
+from gatekeeper.cache import bump_gatekeeper_version, gatekeeper_version, get_timeout_until_transition
+
+
+class GatekeeperTemplateTagTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        cls.a01 = GatekeeperArticleTestModel.objects.create(pk=1, title='Pending')
+        cls.a02 = GatekeeperArticleTestModel.objects.create(pk=2, title='Future', live_as_of=now + timedelta(minutes=30))
+        cls.a03 = GatekeeperArticleTestModel.objects.create(pk=3, title='Older', live_as_of=now - timedelta(days=7))
+        cls.a04 = GatekeeperArticleTestModel.objects.create(pk=4, title='Newer', live_as_of=now - timedelta(days=1))
+        cls.a05 = GatekeeperArticleTestModel.objects.create(pk=5, title='Offline', live_as_of=now - timedelta(days=2),
+            publish_status=-1)
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, source):
+        return Template('{% load gatekeeper_tags %}' + source).render(Context({}))
+
+    def test_gatekeeper_live(self):
+        """
+        Only live objects come back, in the order asked for.
+        """
+        out = self.render(
+            "{% gatekeeper_live 'gatekeeper.GatekeeperArticleTestModel' '-live_as_of' 5 as articles %}"
+            "{% for a in articles %}{{ a.title }},{% endfor %}"
+        )
+        self.assertEqual(out, 'Newer,Older,')
+
+    def test_fragment_is_cached_until_save(self):
+        source = (
+            "{% gatekeepercache 'gatekeeper.GatekeeperArticleTestModel' sidebar %}"
+            "{% gatekeeper_live 'gatekeeper.GatekeeperArticleTestModel' '-live_as_of' 1 as articles %}"
+            "{{ articles.0.title }}{% endgatekeepercache %}"
+        )
+        self.assertEqual(self.render(source), 'Newer')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render(source), 'Newer')
+        # Publishing something invalidates the fragment.
+        self.a01.publish_status = 1
+        self.a01.live_as_of = datetime.now(pytz.utc)
+        self.a01.save()
+        self.assertEqual(self.render(source), 'Pending')
+
+    def test_timeout_ends_at_next_transition(self):
+        timeout = get_timeout_until_transition([GatekeeperArticleTestModel])
+        self.assertTrue(1700 < timeout <= 1801)
+
+    def test_gatekeeper_version(self):
+        version = gatekeeper_version(GatekeeperArticleTestModel)
+        self.assertEqual(gatekeeper_version('gatekeeper.GatekeeperArticleTestModel'), version)
+        self.a03.save()
+        self.assertEqual(gatekeeper_version(GatekeeperArticleTestModel), version + 1)
+        bump_gatekeeper_version('gatekeeper.GatekeeperArticleTestModel')
+        self.assertEqual(
+            self.render("{% gatekeeper_version 'gatekeeper.GatekeeperArticleTestModel' %}"), str(version + 2)
+        )
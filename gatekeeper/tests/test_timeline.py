@@ -0,0 +1,85 @@
+from .models import GatekeeperHomepageTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+import pytz
+import time
+
+from gatekeeper.cache import VERSION_KEY, bump_model_version, get_model_label, get_model_version
+from gatekeeper.timeline import get_timeline_winner, get_winner_at, serial_timeline
+from gatekeeper.utils import get_appropriate_object_from_model
+
+
+class GatekeeperTimelineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = now = datetime.now(pytz.utc)
+        GatekeeperHomepageTestModel.objects.create(pk=1, title='Pending')
+        GatekeeperHomepageTestModel.objects.create(pk=2, title='Fallback', publish_status=1, default_live=True)
+        GatekeeperHomepageTestModel.objects.create(pk=3, title='Offline', live_as_of=now - timedelta(days=15),
+            publish_status=-1)
+        GatekeeperHomepageTestModel.objects.create(pk=4, title='Out of date', live_as_of=now - timedelta(days=15))
+        GatekeeperHomepageTestModel.objects.create(pk=5, title='Live', live_as_of=now - timedelta(days=7))
+        GatekeeperHomepageTestModel.objects.create(pk=6, title='Tomorrow', live_as_of=now + timedelta(days=1))
+        GatekeeperHomepageTestModel.objects.create(pk=7, title='Next week', live_as_of=now + timedelta(days=7))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_timeline(self):
+        now = self.now
+        start, end = now - timedelta(days=30), now + timedelta(days=30)
+        with self.assertNumQueries(1):
+            timeline = serial_timeline(GatekeeperHomepageTestModel, start, end)
+        self.assertEqual(timeline, [
+            (start, now - timedelta(days=15), 2),
+            (now - timedelta(days=15), now - timedelta(days=7), 4),
+            (now - timedelta(days=7), now + timedelta(days=1), 5),
+            (now + timedelta(days=1), now + timedelta(days=7), 6),
+            (now + timedelta(days=7), end, 7),
+        ])
+        self.assertEqual(get_winner_at(timeline, now), get_appropriate_object_from_model(
+            GatekeeperHomepageTestModel).pk)
+        self.assertIsNone(get_winner_at(timeline, end))
+
+    def test_undated_draft_never_wins(self):
+        GatekeeperHomepageTestModel.objects.exclude(pk=1).delete()
+        self.assertIsNone(get_appropriate_object_from_model(GatekeeperHomepageTestModel))
+        self.assertIsNone(get_timeline_winner(GatekeeperHomepageTestModel))
+
+    @override_settings(GATEKEEPER_TIMELINE_HORIZON=3 * 86400)
+    def test_in_memory_timeline(self):
+        self.assertEqual(get_timeline_winner(GatekeeperHomepageTestModel).pk, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_timeline_winner(GatekeeperHomepageTestModel).pk, 5)
+            self.assertEqual(get_timeline_winner(GatekeeperHomepageTestModel,
+                now=self.now + timedelta(hours=30)).pk, 6)
+        # Saving rebuilds it.
+        GatekeeperHomepageTestModel.objects.filter(pk=5).get().delete()
+        self.assertEqual(get_timeline_winner(GatekeeperHomepageTestModel).pk, 4)
+
+    def test_evicted_version_does_not_come_back(self):
+        # If the version key is evicted, it starts again from the clock (not from 1), so a timeline built
+        # at the old version isn't mistaken for a current one.
+        model = GatekeeperHomepageTestModel
+        bump_model_version(model)
+        remembered = get_model_version(model)
+        cache.delete(VERSION_KEY % get_model_label(model))
+        time.sleep(0.01)
+        self.assertGreater(get_model_version(model), remembered)
+        self.assertGreater(bump_model_version(model), remembered)
+
+    def test_version_never_goes_backwards(self):
+        model = GatekeeperHomepageTestModel
+        key = VERSION_KEY % get_model_label(model)
+        # Bumped more times than milliseconds went by...
+        cache.set(key, int(time.time() * 1000) + 10 ** 9, None)
+        remembered = get_model_version(model)
+        # ... and then evicted: starting again from the clock would go backwards.
+        cache.delete(key)
+        self.assertGreater(get_model_version(model), remembered)
+        # Another process re-seeded it lower than this one has already seen.
+        cache.set(key, 5, None)
+        self.assertGreater(get_model_version(model), remembered)
+        self.assertGreater(cache.get(key), remembered)
@@ -0,0 +1,57 @@
+from .models import GatekeeperIsLiveTestModel
+from datetime import datetime, timedelta
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+import pytz
+
+from gatekeeper.signals import gate_transitioned
+from gatekeeper.transitions import process_transitions
+
+
+class GatekeeperIsLiveTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        cls.a01 = GatekeeperIsLiveTestModel.objects.create(pk=1, title='Pending')
+        cls.a02 = GatekeeperIsLiveTestModel.objects.create(pk=2, title='Future', live_as_of=now + timedelta(days=1))
+        cls.a03 = GatekeeperIsLiveTestModel.objects.create(pk=3, title='Live', live_as_of=now - timedelta(days=1))
+        cls.a04 = GatekeeperIsLiveTestModel.objects.create(pk=4, title='Always', publish_status=1)
+        cls.a05 = GatekeeperIsLiveTestModel.objects.create(pk=5, title='Offline', live_as_of=now - timedelta(days=1),
+            publish_status=-1)
+
+    def live_pks(self):
+        return sorted(GatekeeperIsLiveTestModel.objects.live().values_list('pk', flat=True))
+
+    def test_is_live_set_on_save(self):
+        self.assertEqual(self.live_pks(), [3, 4])
+        self.a05.publish_status = 1
+        self.a05.save(update_fields=['publish_status'])
+        self.assertEqual(self.live_pks(), [3, 4, 5])
+
+    def test_live_uses_the_column(self):
+        self.assertIn('"gatekeeper_is_live"', str(GatekeeperIsLiveTestModel.objects.live().query))
+
+    def test_worker_flips_due_rows(self):
+        sent = []
+        def listener(sender, **kwargs):
+            sent.append((sender, kwargs['pks'], kwargs['is_live']))
+        gate_transitioned.connect(listener)
+        try:
+            # Nothing is due yet.
+            self.assertEqual(process_transitions(GatekeeperIsLiveTestModel), 0)
+            # A day passes...
+            later = datetime.now(pytz.utc) + timedelta(days=2)
+            self.assertEqual(process_transitions(GatekeeperIsLiveTestModel, batch_size=1, now=later), 1)
+        finally:
+            gate_transitioned.disconnect(listener)
+        self.assertEqual(sent, [(GatekeeperIsLiveTestModel, [2], True)])
+        self.assertTrue(GatekeeperIsLiveTestModel.objects.get(pk=2).gatekeeper_is_live)
+
+    def test_worker_catches_updates(self):
+        GatekeeperIsLiveTestModel.objects.filter(pk=3).update(publish_status=-1)
+        out = StringIO()
+        call_command('gatekeeper_transitions', stdout=out)
+        self.assertEqual(self.live_pks(), [4])
+        self.assertIn('1 transitioned', out.getvalue())
@@ -0,0 +1,84 @@
+from .models import GatekeeperArticleTestModel, GatekeeperEpisodeTestModel, GatekeeperShowTestModel
+from datetime import datetime, timedelta
+from django.test import TestCase
+import pytz
+
+from gatekeeper.pagination import InvalidCursor, encode_cursor
+from gatekeeper.union import live_union
+
+
+class LiveUnionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        cls.when = when = now - timedelta(days=1)
+        show = GatekeeperShowTestModel.objects.create(title='Show')
+        # Feed order: a1 (now-1h), e1 (when, ties go to the later queryset), a2 (when), e2 (when - 1d), a3 (no date)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='a1', live_as_of=now - timedelta(hours=1))
+        GatekeeperArticleTestModel.objects.create(pk=2, title='a2', live_as_of=when)
+        GatekeeperArticleTestModel.objects.create(pk=3, title='a3', publish_status=1)
+        GatekeeperArticleTestModel.objects.create(pk=4, title='future', live_as_of=now + timedelta(days=1))
+        GatekeeperEpisodeTestModel.objects.create(pk=1, show=show, title='e1', live_as_of=when)
+        GatekeeperEpisodeTestModel.objects.create(pk=2, show=show, title='e2', live_as_of=when - timedelta(days=1))
+        GatekeeperEpisodeTestModel.objects.create(pk=3, show=show, title='offline', publish_status=-1)
+
+    def get_feed(self, **kwargs):
+        return live_union(
+            [GatekeeperArticleTestModel.objects.all(), GatekeeperEpisodeTestModel.objects.all()],
+            fields=['title'], **kwargs
+        )
+
+    def walk(self, feed, per_page):
+        titles, cursor = [], None
+        while True:
+            page = feed.page(cursor, per_page=per_page)
+            titles.extend(row.fields['title'] for row in page)
+            if not page.has_next():
+                return titles
+            cursor = page.next_cursor
+
+    def test_feed_order(self):
+        self.assertEqual(self.walk(self.get_feed(), 10), ['a1', 'e1', 'a2', 'e2', 'a3'])
+        self.assertEqual(self.walk(self.get_feed(order='live_as_of'), 10), ['e2', 'a2', 'e1', 'a1', 'a3'])
+
+    def test_cursor_pagination(self):
+        self.assertEqual(self.walk(self.get_feed(), 2), ['a1', 'e1', 'a2', 'e2', 'a3'])
+        self.assertEqual(self.walk(self.get_feed(order='live_as_of'), 1), ['e2', 'a2', 'e1', 'a1', 'a3'])
+
+    def test_hydration(self):
+        # One UNION query, then one in_bulk() per model on the page.
+        with self.assertNumQueries(3):
+            page = self.get_feed().page(per_page=3)
+        self.assertEqual([row.object.title for row in page], ['a1', 'e1', 'a2'])
+        self.assertEqual([row.model for row in page],
+            [GatekeeperArticleTestModel, GatekeeperEpisodeTestModel, GatekeeperArticleTestModel])
+        self.assertEqual(page[2].live_as_of, self.when)
+
+    def test_no_hydration(self):
+        with self.assertNumQueries(1):
+            page = self.get_feed().page(per_page=10, hydrate=False)
+        self.assertIsNone(page[-1].live_as_of)
+        self.assertIsNone(page[0].object)
+
+    def test_admin_feed(self):
+        self.assertEqual(len(self.walk(self.get_feed(is_auth=True), 10)), 7)
+
+    def test_undated_rows_from_several_models(self):
+        show = GatekeeperShowTestModel.objects.get()
+        GatekeeperEpisodeTestModel.objects.create(pk=4, show=show, title='e3', publish_status=1)
+        self.assertEqual(self.walk(self.get_feed(), 1), ['a1', 'e1', 'a2', 'e2', 'e3', 'a3'])
+        self.assertEqual(self.walk(self.get_feed(order='live_as_of'), 1), ['e2', 'a2', 'e1', 'a1', 'a3', 'e3'])
+
+    def test_seek_is_on_live_as_of(self):
+        feed = self.get_feed()
+        sql = str(feed.get_union((self.when, 0, 2)).query).upper()
+        self.assertNotIn('COALESCE', sql)
+        self.assertIn('"LIVE_AS_OF" <', sql)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            self.get_feed().page('garbage')
+        for cursor in (5, [self.when.isoformat(), 0, 'abc'], [self.when.isoformat(), 'x', 1], [3, 0, 1]):
+            with self.assertRaises(InvalidCursor):
+                self.get_feed().page(encode_cursor(cursor))
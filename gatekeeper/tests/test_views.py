@@ -0,0 +1,144 @@
+from .models import GatekeeperArticleTestModel, GatekeeperCodeTestModel
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from gatekeeper.pagination import InvalidCursor, KeysetPaginator, encode_cursor
+import json
+import pytz
+
+
+class GatekeeperListViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username='gktest',
+            email='test@test.com',
+            password='1@3$5',
+        )
+        now = datetime.now(pytz.utc)
+        # Live: 3, 4, 5, 6 (6 is ALWAYS on without a date, so it sorts last)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Pending')
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Future', live_as_of=now + timedelta(days=7))
+        GatekeeperArticleTestModel.objects.create(pk=3, title='Three', live_as_of=now - timedelta(days=3))
+        GatekeeperArticleTestModel.objects.create(pk=4, title='Four', live_as_of=now - timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=5, title='Five', live_as_of=now - timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=6, title='Six', publish_status=1)
+        GatekeeperArticleTestModel.objects.create(pk=7, title='Offline', live_as_of=now - timedelta(days=2),
+            publish_status=-1)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_pks(self, response):
+        lines = response.content.decode('utf-8').splitlines()
+        return [int(x.split(':')[0]) for x in lines if x and x[0].isdigit()]
+
+    def get_value(self, response, name):
+        for line in response.content.decode('utf-8').splitlines():
+            if line.startswith(name + '='):
+                return line[len(name) + 1:]
+        return None
+
+    def test_public_list(self):
+        response = self.client.get(reverse('article-list'))
+        self.assertEqual(sorted(self.get_pks(response)), [3, 4, 5, 6])
+
+    def test_keyset_pages(self):
+        url = reverse('article-keyset-list')
+        page1 = self.client.get(url)
+        self.assertEqual(self.get_pks(page1), [5, 4])
+        self.assertEqual(self.get_value(page1, 'count'), '4')
+        self.assertIsNone(self.get_value(page1, 'previous'))
+
+        page2 = self.client.get(url, {'cursor': self.get_value(page1, 'next')})
+        self.assertEqual(self.get_pks(page2), [3, 6])
+        self.assertIsNone(self.get_value(page2, 'next'))
+
+        back = self.client.get(url, {'cursor': self.get_value(page2, 'previous')})
+        self.assertEqual(self.get_pks(back), [5, 4])
+
+    def test_keyset_pages_for_admin(self):
+        self.client.login(username='gktest', password='1@3$5')
+        url = reverse('article-keyset-list')
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            seen += self.get_pks(response)
+            cursor = self.get_value(response, 'next')
+            if not cursor:
+                break
+        self.assertEqual(seen, [2, 5, 4, 3, 6, 1])
+
+    def test_keyset_pages_with_string_pks(self):
+        now = datetime.now(pytz.utc)
+        for i, code in enumerate(['s1', 's2', 's3']):
+            GatekeeperCodeTestModel.objects.create(code=code, live_as_of=now - timedelta(days=i))
+        GatekeeperCodeTestModel.objects.create(code='u1', publish_status=1)
+        GatekeeperCodeTestModel.objects.create(code='u2', publish_status=1)
+        paginator = KeysetPaginator(GatekeeperCodeTestModel.objects.all(), 2)
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([[o.pk for o in page] for page in pages], [['s1', 's2'], ['s3', 'u2'], ['u1']])
+        back = paginator.page(pages[2].previous_cursor)
+        self.assertEqual([o.pk for o in back], ['s3', 'u2'])
+        self.assertEqual([o.pk for o in paginator.page(back.previous_cursor)], ['s1', 's2'])
+
+    def test_keyset_orderings_are_plain(self):
+        paginator = KeysetPaginator(GatekeeperArticleTestModel.objects.all(), 2)
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(paginator.page().next_cursor)
+        for query in queries.captured_queries:
+            self.assertNotIn('IS NULL', query['sql'].split('ORDER BY')[1])
+
+    def test_cursor_pk_must_match_the_model(self):
+        paginator = KeysetPaginator(GatekeeperArticleTestModel.objects.all(), 2)
+        with self.assertRaises(InvalidCursor):
+            paginator.page(encode_cursor(['n', None, 'abc']))
+
+    def test_bad_cursor(self):
+        response = self.client.get(reverse('article-keyset-list'), {'cursor': 'garbage!'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        url = reverse('article-keyset-list')
+        # Decodes fine, but isn't a list...
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor(5)}).status_code, 404)
+        # ... or the pk (or date) isn't what it should be.
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor(['n', None, 'abc'])}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'cursor': encode_cursor(['n', 5, 3])}).status_code, 404)
+
+    def get_json(self, **params):
+        response = self.client.get(reverse('article-json'), params)
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content).decode('utf-8'))
+
+    def test_json_stream(self):
+        data = self.get_json()
+        self.assertEqual([a['id'] for a in data['results']], [3, 4, 5, 6])
+        self.assertEqual(sorted(data['results'][0].keys()), ['id', 'live_as_of', 'title'])
+        self.assertIsNone(data['next'])
+        self.assertEqual(self.get_json(fields='title')['results'][0], {'title': 'Three'})
+
+    def test_json_stream_cursor(self):
+        seen = []
+        cursor = None
+        while True:
+            data = self.get_json(limit=3, **({'cursor': cursor} if cursor else {}))
+            seen += [a['id'] for a in data['results']]
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(seen, [3, 4, 5, 6])
+
+    def test_json_stream_bad_requests(self):
+        self.assertEqual(self.client.get(reverse('article-json'), {'fields': 'publish_status'}).status_code, 400)
+        for cursor in ('garbage!', encode_cursor('abc'), encode_cursor(['abc']), encode_cursor([True]),
+                encode_cursor([]), encode_cursor({'pk': 3})):
+            self.assertEqual(self.client.get(reverse('article-json'), {'cursor': cursor}).status_code, 400)
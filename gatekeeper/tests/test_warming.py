@@ -0,0 +1,48 @@
+from .models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from io import StringIO
+import pytz
+
+from gatekeeper.warming import get_gatekeeper_models, get_live_pks, get_serial_winner_pk, get_state_counts
+
+
+class GatekeeperWarmingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        now = datetime.now(pytz.utc)
+        GatekeeperArticleTestModel.objects.create(pk=1, title='Pending')
+        GatekeeperArticleTestModel.objects.create(pk=2, title='Future', live_as_of=now + timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=3, title='Live', live_as_of=now - timedelta(days=1))
+        GatekeeperArticleTestModel.objects.create(pk=4, title='Always', publish_status=1)
+        GatekeeperArticleTestModel.objects.create(pk=5, title='Offline', publish_status=-1)
+        GatekeeperHomepageTestModel.objects.create(pk=1, title='Old', live_as_of=now - timedelta(days=7))
+        GatekeeperHomepageTestModel.objects.create(pk=2, title='Current', live_as_of=now - timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_discovers_models(self):
+        models = get_gatekeeper_models()
+        self.assertIn(GatekeeperArticleTestModel, models)
+        self.assertIn(GatekeeperHomepageTestModel, models)
+
+    def test_warm_command(self):
+        call_command('gatekeeper_warm', workers=1, stdout=StringIO())
+        with self.assertNumQueries(0):
+            self.assertEqual(get_serial_winner_pk(GatekeeperHomepageTestModel), 2)
+            self.assertEqual(get_live_pks(GatekeeperArticleTestModel), frozenset([3, 4]))
+            self.assertEqual(get_state_counts(GatekeeperArticleTestModel), {
+                'always': 1, 'live': 1, 'scheduled': 1, 'draft': 1, 'offline': 1,
+            })
+
+    def test_save_invalidates(self):
+        self.assertEqual(get_live_pks(GatekeeperArticleTestModel), frozenset([3, 4]))
+        GatekeeperArticleTestModel.objects.filter(pk=5).get().delete()
+        a = GatekeeperArticleTestModel.objects.get(pk=1)
+        a.publish_status = 1
+        a.save()
+        self.assertEqual(get_live_pks(GatekeeperArticleTestModel), frozenset([1, 3, 4]))
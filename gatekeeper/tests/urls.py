@@ -1,19 +1,32 @@
 from django.conf import settings
 from django.conf.urls import include, url
 from django.contrib import admin
+from django.views.static import serve
+
+from .views import (
+    ArticleCachedDetailView, ArticleDetailView, ArticleJSONView, ArticleKeysetListView, ArticleListView,
+    HomepageDetailView
+)
 
 admin.autodiscover()
 
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
+    url(r'^articles/$', ArticleListView.as_view(), name='article-list'),
+    url(r'^articles/keyset/$', ArticleKeysetListView.as_view(), name='article-keyset-list'),
+    url(r'^articles/json/$', ArticleJSONView.as_view(), name='article-json'),
+    url(r'^articles/(?P<pk>\d+)/$', ArticleDetailView.as_view(), name='article-detail'),
+    url(r'^articles/cached/(?P<pk>\d+)/$', ArticleCachedDetailView.as_view(), name='article-cached-detail'),
+    url(r'^homepage/$', HomepageDetailView.as_view(), name='homepage-live'),
+    url(r'^homepage/(?P<pk>\d+)/$', HomepageDetailView.as_view(), name='homepage-detail'),
 ]
 
 if settings.DEBUG:
     urlpatterns = [
         url(
             r'^media/(?P<path>.*)$',
-            'django.views.static.serve',
+            serve,
             {'document_root': settings.MEDIA_ROOT, 'show_indexes': True}
         ),
         url(r'', include('django.contrib.staticfiles.urls')),
-    ] + urlpatterns
\ No newline at end of file
+    ] + urlpatterns
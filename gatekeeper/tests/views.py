@@ -0,0 +1,33 @@
+from django.views.generic import DetailView, ListView, View
+
+from ..mixins import GatekeeperDetailMixin, GatekeeperJSONStreamMixin, GatekeeperListMixin, GatekeeperSerialMixin
+from .models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+
+class ArticleListView(GatekeeperListMixin, ListView):
+    model = GatekeeperArticleTestModel
+    template_name = 'gatekeeper/article_list.html'
+    context_object_name = 'articles'
+
+class ArticleKeysetListView(ArticleListView):
+    paginate_by = 2
+    keyset_pagination = True
+    keyset_count = 'cached'
+
+class ArticleJSONView(GatekeeperJSONStreamMixin, View):
+    model = GatekeeperArticleTestModel
+    json_fields = ('id', 'title', 'live_as_of')
+    json_chunk_size = 2
+
+class ArticleDetailView(GatekeeperDetailMixin, DetailView):
+    model = GatekeeperArticleTestModel
+    template_name = 'gatekeeper/article_detail.html'
+    context_object_name = 'article'
+
+class ArticleCachedDetailView(ArticleDetailView):
+    gatekeeper_cache_object = True
+    gatekeeper_cache_404 = True
+
+class HomepageDetailView(GatekeeperSerialMixin, DetailView):
+    model = GatekeeperHomepageTestModel
+    template_name = 'gatekeeper/homepage_detail.html'
+    context_object_name = 'homepage'
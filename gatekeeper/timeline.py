@@ -0,0 +1,215 @@
+import copy
+import pytz
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+from .cache import get_model_label, get_model_version
+from .registry import get_model_info
+from .routers import gatekeeper_db_for_read
+
+"""
+The serial timeline:  who wins (see get_appropriate_object_from_model) not just NOW, but at every moment
+over a range of time.
+
+The winner of a serial model can only change when an object's live_as_of date arrives (or when something is
+saved), so from ONE scan of the candidate rows, the whole schedule can be worked out as a short list of
+intervals:
+
+    [(from, to, winner_pk), ...]
+
+That's handy for showing editors what's coming up --- and for serving the live homepage:  the serial mixin can
+keep the timeline in memory and just look up "now" in it (see get_timeline_winner), only rebuilding it when an
+object of the model is saved.   Every process checks the model's version in the gatekeeper cache to see whether
+anything was saved, so only do that with a cache that all your processes share!   (With a per-process cache like
+LocMemCache, a save only reaches the process that made it, and the others keep serving the old timeline.)
+
+Settings:
+    GATEKEEPER_TIMELINE_HORIZON: how far ahead (in seconds) the in-memory timeline is built (default: 86400)
+"""
+
+def _get_queryset(model_or_qs):
+    if isinstance(model_or_qs, QuerySet):
+        return model_or_qs
+    return model_or_qs._default_manager.all()
+
+def _ranked(rows, modified_index):
+    """
+    Rules 3 and 4 pick the most recently modified object (or the first by pk if there's no modified field).
+    Returns {pk: rank}, where the lowest rank wins.
+    """
+    rows = sorted(rows, key=lambda r: r[0])
+    if modified_index is not None:
+        # Python's sort is stable (even reversed), so ties on the modified date stay in pk order.
+        dated = sorted([r for r in rows if r[modified_index] is not None], key=lambda r: r[modified_index],
+            reverse=True)
+        rows = dated + [r for r in rows if r[modified_index] is None]
+    return dict((row[0], rank) for rank, row in enumerate(rows))
+
+def _get_fields(model):
+    """
+    The values_list() fields a timeline needs, and where default_live and the modified date are in them
+    (None if the model doesn't have them).
+    """
+    info = get_model_info(model)
+    fields = ['pk', 'publish_status', 'live_as_of']
+    default_index = modified_index = None
+    if info is None or info.is_serial:
+        default_index = len(fields)
+        fields.append('default_live')
+    if info is not None and info.modified_field:
+        modified_index = len(fields)
+        fields.append(info.modified_field)
+    return fields, default_index, modified_index
+
+def _eligible_at(row, start):
+    """
+    Everything becomes eligible at its live_as_of (or at the start, if it's NULL or already past).
+    """
+    if row[2] is None or row[2] < start:
+        return start
+    return row[2]
+
+class _Contenders(object):
+    """
+    The best candidate so far under each of Rules 2, 3 and 4, as rows become eligible.
+    """
+    def __init__(self, rows, default_index, modified_index):
+        # Rules 3 and 4 (ALWAYS Available, then default_live) are ranked ahead of time.
+        self.always_rank = _ranked([r for r in rows if r[1] == 1], modified_index)
+        self.default_rank = _ranked(
+            [r for r in rows if default_index is not None and r[default_index] and r[1] != 1], modified_index
+        )
+        self.best_dated = self.best_always = self.best_default = None
+
+    def _better(self, rank, pk, best):
+        return pk in rank and (best is None or rank[pk] < rank[best])
+
+    def add(self, row):
+        pk, publish_status, live_as_of = row[:3]
+        if publish_status == 0 and live_as_of is not None:
+            # Rule 2: most recent live_as_of (ties go to the highest pk).
+            if self.best_dated is None or (live_as_of, pk) > self.best_dated:
+                self.best_dated = (live_as_of, pk)
+        if self._better(self.always_rank, pk, self.best_always):
+            self.best_always = pk
+        if self._better(self.default_rank, pk, self.best_default):
+            self.best_default = pk
+
+    def winner(self):
+        if self.best_dated is not None:
+            return self.best_dated[1]
+        if self.best_always is not None:
+            return self.best_always
+        return self.best_default
+
+def _intervals(events, contenders, start, end):
+    """
+    Walks the events (rows, in the order they become eligible) and records every change of winner.
+    """
+    intervals = []
+    current_from = t = start
+    current = None
+    i = 0
+    while True:
+        while i < len(events) and _eligible_at(events[i], start) <= t:
+            contenders.add(events[i])
+            i += 1
+        winner = contenders.winner()
+        if t == start:
+            current = winner
+        elif winner != current:
+            intervals.append((current_from, t, current))
+            current_from, current = t, winner
+        if i >= len(events):
+            break
+        t = _eligible_at(events[i], start)
+    intervals.append((current_from, end, current))
+    return intervals
+
+def serial_timeline(model_or_qs, start, end):
+    """
+    Returns the ordered list of (from, to, winner_pk) intervals that cover start to end.
+    winner_pk is None for any stretch where nothing passes the gate.
+
+    model_or_qs is a serial gatekeeper model, or a queryset of one (as with get_appropriate_object_from_model).
+    """
+    qs = _get_queryset(model_or_qs)
+    fields, default_index, modified_index = _get_fields(qs.model)
+
+    # Rule 0: only objects that COULD be in play can play - and nothing at or after the end matters.
+    rows = list(qs.exclude(publish_status=-1).exclude(live_as_of__gte=end).values_list(*fields))
+
+    contenders = _Contenders(rows, default_index, modified_index)
+    events = sorted(rows, key=lambda row: _eligible_at(row, start))
+    return _intervals(events, contenders, start, end)
+
+def get_winner_at(timeline, when):
+    """
+    Looks up the winner_pk at a point in time (None if it's outside the timeline).
+    """
+    starts = [interval[0] for interval in timeline]
+    i = bisect_right(starts, when) - 1
+    if i < 0 or when >= timeline[-1][1]:
+        return None
+    return timeline[i][2]
+
+class InMemoryTimeline(object):
+    """
+    A timeline for one model, with the winning objects, as of one version of the model.
+    """
+    def __init__(self, model, version, start, end, intervals, objects):
+        self.model = model
+        self.version = version
+        self.start = start
+        self.end = end
+        self.intervals = intervals
+        self.starts = [interval[0] for interval in intervals]
+        self.objects = objects
+
+    def is_current(self, version, now):
+        return self.version == version and self.start <= now < self.end
+
+    def get_winner(self, now):
+        i = bisect_right(self.starts, now) - 1
+        pk = self.intervals[i][2]
+        return self.objects.get(pk)
+
+_timelines = {}
+
+def get_timeline_horizon():
+    return getattr(settings, 'GATEKEEPER_TIMELINE_HORIZON', 86400)
+
+def build_in_memory_timeline(model, now=None):
+    if now is None:
+        now = datetime.now(pytz.utc)
+    version = get_model_version(model)
+    qs = model._default_manager.all()
+    using = gatekeeper_db_for_read(model, False)
+    if using is not None:
+        qs = qs.using(using)
+    end = now + timedelta(seconds=get_timeline_horizon())
+    intervals = serial_timeline(qs, now, end)
+    pks = set(interval[2] for interval in intervals if interval[2] is not None)
+    objects = qs.in_bulk(list(pks)) if pks else {}
+    timeline = InMemoryTimeline(model, version, now, end, intervals, objects)
+    _timelines[get_model_label(model)] = timeline
+    return timeline
+
+def get_timeline_winner(model, now=None):
+    """
+    The live (public) object of a serial model, from the in-memory timeline.
+    The only thing this checks on each call is the model's cache version (to see if anything was saved).
+    Returns a copy of the object (so nobody changes the one in the timeline), or None.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    timeline = _timelines.get(get_model_label(model))
+    if timeline is None or not timeline.is_current(get_model_version(model), now):
+        timeline = build_in_memory_timeline(model, now=now)
+    winner = timeline.get_winner(now)
+    if winner is None:
+        return None
+    return copy.copy(winner)
@@ -0,0 +1,134 @@
+import pytz
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+
+from .cache import get_gatekeeper_cache, get_model_label
+from .registry import get_model_info, get_registered_models
+from .signals import gate_transitioned
+from .view_utils import live_q
+
+"""
+The transition worker.
+
+For models with a maintained gatekeeper_is_live column (GatekeeperIsLiveAbstractModel), it's set when the object
+is saved --- but an object that's scheduled to go live next Tuesday at 9am won't be saved next Tuesday at 9am.
+process_transitions() catches those up: it finds rows where gatekeeper_is_live disagrees with the gate and flips
+them.
+
+It's safe to run on several app nodes at once:  each batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED
+(where the database supports it), so two workers never grab the same rows, and a worker never waits on another.
+
+Models WITHOUT a gatekeeper_is_live column have nothing to flip, but everything downstream (caches, CDN purges...)
+still needs to hear that objects went live.   For those, process_scheduled_transitions() finds the objects whose
+live_as_of has passed since the last run (the "watermark", kept in the cache) and announces them.
+
+Either way, gate_transitioned is sent for every batch of objects (see signals.py).
+
+Run it with the gatekeeper_transitions management command.
+
+Settings:
+    GATEKEEPER_TRANSITION_LOOKBACK: the first time it runs (or if the cache has been cleared) how far back
+        (in seconds) to look for objects that went live (default: 3600)
+"""
+
+WATERMARK_KEY = 'gatekeeper:transitions:watermark:%s'
+LOCK_KEY = 'gatekeeper:transitions:lock:%s'
+
+def get_live_flag_models():
+    """
+    All the installed models that maintain a gatekeeper_is_live column.
+    """
+    return [m for m in get_registered_models() if get_model_info(m).live_flag]
+
+def claim_batch(qs, batch_size, using):
+    """
+    Lock (and return the pks of) up to batch_size rows from qs, skipping any rows another worker has locked.
+    Must be called inside a transaction.
+    """
+    features = connections[using].features
+    if features.has_select_for_update_skip_locked:
+        qs = qs.select_for_update(skip_locked=True)
+    elif features.has_select_for_update:
+        qs = qs.select_for_update()
+    return list(qs.order_by('pk').values_list('pk', flat=True)[:batch_size])
+
+def process_transitions(model, batch_size=500, now=None):
+    """
+    Flips gatekeeper_is_live on every row of the model that has gone live (or dark) without being saved.
+    Returns the number of rows flipped.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    using = router.db_for_write(model)
+    manager = model._default_manager.db_manager(using)
+    total = 0
+    for is_live in (True, False):
+        if is_live:
+            due = manager.filter(gatekeeper_is_live=False).filter(live_q(now))
+        else:
+            due = manager.filter(gatekeeper_is_live=True).exclude(live_q(now))
+        while True:
+            with transaction.atomic(using=using):
+                pks = claim_batch(due, batch_size, using)
+                if pks:
+                    manager.filter(pk__in=pks).update(gatekeeper_is_live=is_live)
+            if not pks:
+                break
+            gate_transitioned.send(sender=model, pks=pks, is_live=is_live, now=now)
+            total += len(pks)
+            if len(pks) < batch_size:
+                break
+    return total
+
+def process_scheduled_transitions(model, batch_size=500, now=None):
+    """
+    Sends gate_transitioned for every object of the model that went live since the last run.
+    Returns the number of objects.
+
+    Only one node does this for a model at a time (the others just skip it).
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    cache = get_gatekeeper_cache()
+    label = get_model_label(model)
+    if not cache.add(LOCK_KEY % label, True, 300):
+        return 0
+    try:
+        watermark = cache.get(WATERMARK_KEY % label)
+        if watermark is None:
+            watermark = now - timedelta(seconds=getattr(settings, 'GATEKEEPER_TRANSITION_LOOKBACK', 3600))
+        if watermark >= now:
+            return 0
+        due = model._default_manager.filter(
+            publish_status=0, live_as_of__gt=watermark, live_as_of__lte=now
+        ).order_by('pk').values_list('pk', flat=True)
+        total = 0
+        last_pk = None
+        while True:
+            batch = due if last_pk is None else due.filter(pk__gt=last_pk)
+            pks = list(batch[:batch_size])
+            if not pks:
+                break
+            gate_transitioned.send(sender=model, pks=pks, is_live=True, now=now)
+            total += len(pks)
+            last_pk = pks[-1]
+        cache.set(WATERMARK_KEY % label, now, None)
+        return total
+    finally:
+        cache.delete(LOCK_KEY % label)
+
+def process_all_transitions(batch_size=500, now=None):
+    """
+    Runs process_transitions() for every model with a gatekeeper_is_live column,
+    and process_scheduled_transitions() for every other gatekeeper model.
+    Returns {model: number of objects transitioned}.
+    """
+    results = {}
+    for model in get_registered_models():
+        if get_model_info(model).live_flag:
+            results[model] = process_transitions(model, batch_size=batch_size, now=now)
+        else:
+            results[model] = process_scheduled_transitions(model, batch_size=batch_size, now=now)
+    return results
@@ -0,0 +1,158 @@
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import six
+
+from .pagination import (
+    InvalidCursor, KeysetPage, decode_cursor, encode_cursor, parse_cursor_datetime, parse_cursor_pk
+)
+from .view_utils import view_gatekeeper
+
+"""
+One live feed from several models, e.g. a "Watch" page that mixes episodes, specials and articles.
+
+The old way was to run each queryset through view_gatekeeper, evaluate them all, and merge (and paginate!)
+in Python --- which means loading every page's worth from every model to show one page.   live_union() does it
+in the database instead, with one UNION ALL query:
+
+    feed = live_union([Episode.objects.all(), Special.objects.all(), Article.objects.all()], fields=['title'])
+    page = feed.page(request.GET.get('cursor'), per_page=20)
+    for row in page:
+        row.object          # the Episode/Special/Article (loaded in bulk: one query per model on the page)
+        row.fields['title'] # or just use what was selected, without loading the objects at all
+
+Each queryset is gated, the rows are ordered on (live_as_of, which queryset, pk), and pages are keyset-paginated
+(see pagination.py).   Objects with no live_as_of come last.   The seek conditions are on live_as_of itself (with
+a separate branch for the NULLs), so each part of the UNION can use an index on (live_as_of, pk) if the model
+has one (see pagination.py).
+Feeds only page forward (there's a next_cursor but no previous_cursor).
+
+The fields have to exist (with the same types) on every model.
+"""
+
+class LiveUnionRow(object):
+    """
+    One row of the feed: which model it came from, its pk and live_as_of, the selected fields,
+    and (once hydrated) the object itself.
+    """
+    __slots__ = ('model', 'pk', 'live_as_of', 'fields', 'object')
+
+    def __init__(self, model, pk, live_as_of, fields, obj=None):
+        self.model = model
+        self.pk = pk
+        self.live_as_of = live_as_of
+        self.fields = fields
+        self.object = obj
+
+    def __repr__(self):
+        return '<LiveUnionRow: %s %s>' % (self.model._meta.label, self.pk)
+
+class LiveUnion(object):
+    def __init__(self, querysets, order='-live_as_of', fields=None, is_auth=False):
+        if not querysets:
+            raise ValueError('live_union() needs at least one queryset')
+        if order not in ('-live_as_of', 'live_as_of'):
+            raise ValueError("live_union() can only be ordered by 'live_as_of' or '-live_as_of', not %r" % order)
+        self.querysets = [view_gatekeeper(qs, is_auth) for qs in querysets]
+        self.descending = order.startswith('-')
+        self.fields = list(fields or [])
+
+    def _after(self, index, cursor):
+        """
+        For the index-th queryset: everything that comes after the cursor's (live_as_of, index, pk), or None if
+        nothing does.   Rows with no live_as_of come after all the others (in index, then pk order).
+        """
+        c_live_as_of, c_index, c_pk = cursor
+        past, pk_past = ('lt', 'pk__lt') if self.descending else ('gt', 'pk__gt')
+        index_past = index < c_index if self.descending else index > c_index
+        if c_live_as_of is None:
+            if index == c_index:
+                return Q(live_as_of__isnull=True, **{pk_past: c_pk})
+            return Q(live_as_of__isnull=True) if index_past else None
+        nulls = Q(live_as_of__isnull=True)
+        if index == c_index:
+            same_date = Q(live_as_of=c_live_as_of, **{pk_past: c_pk})
+            return Q(**{'live_as_of__' + past: c_live_as_of}) | same_date | nulls
+        if index_past:
+            return Q(**{'live_as_of__%se' % past: c_live_as_of}) | nulls
+        return Q(**{'live_as_of__' + past: c_live_as_of}) | nulls
+
+    def get_union(self, cursor=None):
+        """
+        The UNION ALL queryset of (pk, fields..., live_as_of, 1 if it's NULL, queryset index) tuples, in feed order,
+        starting after the cursor (a decoded (live_as_of, index, pk)).   None if nothing comes after it.
+        """
+        parts = []
+        for index, qs in enumerate(self.querysets):
+            if cursor is not None:
+                after = self._after(index, cursor)
+                if after is None:
+                    continue
+                qs = qs.filter(after)
+            qs = qs.annotate(
+                gk_undated=Case(When(live_as_of__isnull=True, then=Value(1)), default=Value(0),
+                    output_field=IntegerField()),
+                gk_index=Value(index, output_field=IntegerField()),
+            )
+            # Ordering isn't allowed inside the parts of a UNION (on some databases), so clear it.
+            parts.append(qs.order_by().values_list('pk', *(self.fields + ['live_as_of', 'gk_undated', 'gk_index'])))
+        if not parts:
+            return None
+        union = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+        # (NULLS LAST can't be said portably in the ORDER BY of a UNION, hence gk_undated.)
+        if self.descending:
+            return union.order_by('gk_undated', '-live_as_of', '-gk_index', '-pk')
+        return union.order_by('gk_undated', 'live_as_of', 'gk_index', 'pk')
+
+    def _row(self, values):
+        pk = values[0]
+        live_as_of, index = values[-3], values[-1]
+        fields = dict(zip(self.fields, values[1:-3]))
+        return LiveUnionRow(self.querysets[index].model, pk, live_as_of, fields), index
+
+    def hydrate(self, rows_and_indexes):
+        """
+        Loads the objects for the rows: one in_bulk() query per queryset that has rows on the page.
+        """
+        wanted = {}
+        for row, index in rows_and_indexes:
+            wanted.setdefault(index, []).append(row.pk)
+        loaded = dict((index, self.querysets[index].in_bulk(pks)) for index, pks in wanted.items())
+        for row, index in rows_and_indexes:
+            row.object = loaded[index].get(row.pk)
+
+    def _cursor_for(self, row, index):
+        live_as_of = row.live_as_of.isoformat() if row.live_as_of is not None else None
+        return encode_cursor([live_as_of, index, row.pk])
+
+    def _decode(self, cursor):
+        """
+        Returns the cursor's (live_as_of, index, pk), or raises InvalidCursor.
+        """
+        try:
+            live_as_of, index, pk = decode_cursor(cursor)
+        except (InvalidCursor, TypeError, ValueError):
+            raise InvalidCursor('Invalid cursor: %r' % cursor)
+        if isinstance(index, bool) or not isinstance(index, six.integer_types) or not 0 <= index < len(self.querysets):
+            raise InvalidCursor('Invalid cursor: %r' % cursor)
+        return parse_cursor_datetime(live_as_of), index, parse_cursor_pk(self.querysets[index].model, pk)
+
+    def page(self, cursor=None, per_page=20, hydrate=True):
+        """
+        Returns a KeysetPage of LiveUnionRows (page.next_cursor gets the next one).
+        Raises InvalidCursor if the cursor is garbage.
+        """
+        union = self.get_union(self._decode(cursor) if cursor else None)
+        per_page = int(per_page)
+        # Ask for one extra to see if there's anything beyond this page.
+        rows = [self._row(values) for values in union[:per_page + 1]] if union is not None else []
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if hydrate:
+            self.hydrate(rows)
+        next_cursor = self._cursor_for(*rows[-1]) if has_more else None
+        return KeysetPage([row for row, index in rows], self, next_cursor=next_cursor)
+
+def live_union(querysets, order='-live_as_of', fields=None, is_auth=False):
+    """
+    A single gated, keyset-paginated feed over several querysets (of gatekeeper models).
+    """
+    return LiveUnion(querysets, order=order, fields=fields, is_auth=is_auth)
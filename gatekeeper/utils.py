@@ -1,6 +1,10 @@
 from datetime import datetime
 import pytz
 
+from django.db.models import Case, DateTimeField, F, Value, When
+
+from .registry import get_model_info
+
 """
  THIS IS THE MAIN GATEKEEPER
  
@@ -43,6 +47,75 @@ STANDLONE OBJECTS:
     
 """
 
+# The five publish states (see above) by name.
+GATE_STATE_ALWAYS = 'always'        # publish_status =  1
+GATE_STATE_LIVE = 'live'            # publish_status =  0, live_as_of in the past
+GATE_STATE_SCHEDULED = 'scheduled'  # publish_status =  0, live_as_of in the future
+GATE_STATE_DRAFT = 'draft'          # publish_status =  0, live_as_of is NULL
+GATE_STATE_OFFLINE = 'offline'      # publish_status = -1
+
+GATE_STATES = (GATE_STATE_ALWAYS, GATE_STATE_LIVE, GATE_STATE_SCHEDULED, GATE_STATE_DRAFT, GATE_STATE_OFFLINE)
+
+# effective_live_from for ALWAYS Available objects: "live since forever" (as early as every database can store).
+ALWAYS_LIVE_FROM = datetime(1000, 1, 1, tzinfo=pytz.utc)
+
+def get_effective_live_from(publish_status, live_as_of):
+    """
+    When an object is live to the public from, as ONE value (see GatekeeperEffectiveLiveAbstractModel):
+        publish_status = 1: ALWAYS_LIVE_FROM (i.e., minus infinity)
+        publish_status = 0: live_as_of (None if it's never been published)
+        publish_status = -1: None (i.e., plus infinity - it's never live)
+    So "live to the public now" is just effective_live_from <= now.
+    """
+    if publish_status is not None and publish_status > 0:
+        return ALWAYS_LIVE_FROM
+    if publish_status == 0:
+        return live_as_of
+    return None
+
+def get_effective_live_from_expression():
+    """
+    get_effective_live_from() as a database expression, for queryset.update(effective_live_from=...).
+    """
+    return Case(
+        When(publish_status__gt=0, then=Value(ALWAYS_LIVE_FROM)),
+        When(publish_status=0, then=F('live_as_of')),
+        default=Value(None), output_field=DateTimeField()
+    )
+
+def backfill_effective_live_from(model, batch_size=1000):
+    """
+    Recomputes effective_live_from for every row of the model, a batch of pks at a time, for rows that
+    predate the column or were changed with queryset.update().  Returns the number of rows updated.
+    """
+    manager = model._default_manager
+    pks = manager.order_by('pk').values_list('pk', flat=True)
+    value = get_effective_live_from_expression()
+    total = 0
+    last_pk = None
+    while True:
+        batch = list((pks if last_pk is None else pks.filter(pk__gt=last_pk))[:batch_size])
+        if not batch:
+            return total
+        total += manager.filter(pk__in=batch).update(effective_live_from=value)
+        last_pk = batch[-1]
+
+def get_gate_state(publish_status, live_as_of, now=None):
+    """
+    Returns which of the five publish states an object is in.
+    """
+    if publish_status is not None and publish_status > 0:
+        return GATE_STATE_ALWAYS
+    if publish_status is not None and publish_status < 0:
+        return GATE_STATE_OFFLINE
+    if live_as_of is None:
+        return GATE_STATE_DRAFT
+    if now is None:
+        now = datetime.now(pytz.utc)
+    if live_as_of <= now:
+        return GATE_STATE_LIVE
+    return GATE_STATE_SCHEDULED
+
 def can_object_page_be_shown(user, this_object, including_parents=False):
     """
     RAD: 4 Oct 2018 --- so a weird condition happened, and I'm not sure what the appropriate
@@ -58,18 +131,18 @@ def can_object_page_be_shown(user, this_object, including_parents=False):
         MATTER what the 
     
     """
-    try:
-        if user.is_staff: # admin users can always see pages
-            if this_object.publish_status >= 0 or this_object.treat_as_standalone == 1:
-                return True # I can see everything except specifically turned-off objects because I'm an admin
-    except:
-        pass # I am not logged in - continue
+    if not this_object: # this object isn't live or doesn't exist
+        return False
+
+    if user is not None and user.is_staff: # admin users can always see pages
+        if this_object.publish_status >= 0:
+            return True # I can see everything except specifically turned-off objects because I'm an admin
+        info = get_model_info(this_object.__class__)
+        if info is not None and info.standalone and this_object.treat_as_standalone == 1:
+            return True
 
     if this_object.publish_status == 1: # this object is ALWAYS live
         return True
-        
-    if not this_object: # this object isn't live or doesn't exist
-        return False
     
     # THIS IS CORRECT: even if standaalone is "true" if publish is <0 then do not pass!
     if this_object.publish_status < 0:  # this object isn't live
@@ -110,7 +183,67 @@ def can_object_page_be_shown(user, this_object, including_parents=False):
 def can_object_page_be_shown_to_pubilc(this_object):
     return can_object_page_be_shown(None, this_object, including_parents=False)
 
-def get_appropriate_object_from_model(object_set, is_queryset=False):
+def _get_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def evaluate_gate_bulk(publish_status_seq, live_as_of_seq, is_auth, at=None, use_numpy=None):
+    """
+    The gate for a LOT of things at once that aren't model instances (API payloads, values_list() dumps,
+    rows being imported...).   Takes parallel sequences of publish_status and live_as_of values and returns
+    a list of True/False, one for each --- by the same rules as can_object_page_be_shown():
+
+        is_auth = True: everything except publish_status = -1
+        is_auth = False: publish_status = 1, or publish_status = 0 with a live_as_of at or before `at`
+
+    Everything is checked against ONE time (at, default now), so the answer can't change halfway through.
+    live_as_of values should be timezone-aware (like Django gives you with USE_TZ = True).
+
+    If NumPy is installed, and either sequence is a NumPy array (or use_numpy = True), it's done with array
+    operations instead and returns a NumPy array of bools.   live_as_of can then be a datetime64 array (in UTC,
+    with NaT for no date), which is the fast way to do a million rows.
+    """
+    if len(publish_status_seq) != len(live_as_of_seq):
+        raise ValueError('publish_status_seq and live_as_of_seq must be the same length')
+    if at is None:
+        at = datetime.now(pytz.utc)
+
+    numpy = _get_numpy() if use_numpy is not False else None
+    if numpy is not None and (use_numpy or isinstance(publish_status_seq, numpy.ndarray)
+                              or isinstance(live_as_of_seq, numpy.ndarray)):
+        return _evaluate_gate_numpy(numpy, publish_status_seq, live_as_of_seq, is_auth, at)
+    if use_numpy:
+        raise ImportError('evaluate_gate_bulk(use_numpy=True) needs NumPy')
+
+    if is_auth:
+        return [status is not None and status >= 0 for status in publish_status_seq]
+    return [
+        status is not None and (status > 0 or (status == 0 and live_as_of is not None and live_as_of <= at))
+        for status, live_as_of in zip(publish_status_seq, live_as_of_seq)
+    ]
+
+def _evaluate_gate_numpy(numpy, publish_status_seq, live_as_of_seq, is_auth, at):
+    status = numpy.asarray(publish_status_seq)
+    if status.dtype == object:
+        # None (no status) never passes.
+        status = numpy.array([-1 if s is None else s for s in status], dtype=numpy.int64)
+    if is_auth:
+        return status >= 0
+
+    live_as_of = numpy.asarray(live_as_of_seq)
+    if live_as_of.dtype == object:
+        live_as_of = numpy.array([
+            numpy.datetime64('NaT') if d is None else numpy.datetime64(d.astimezone(pytz.utc).replace(tzinfo=None))
+            for d in live_as_of
+        ], dtype='datetime64[us]')
+    cutoff = numpy.datetime64(at.astimezone(pytz.utc).replace(tzinfo=None))
+    # NaT (no live_as_of) compares False, so drafts never pass.
+    return (status > 0) | ((status == 0) & (live_as_of <= cutoff))
+
+def get_appropriate_object_from_model(object_set, is_queryset=False, using=None):
     """
     Tools:
         - publish_status = {1: always on, 0: conditionally on, -1: always off, NULL never published}
@@ -132,6 +265,8 @@ def get_appropriate_object_from_model(object_set, is_queryset=False):
     RAD 13-Feb-2019
         I've added an optional arg that allows processing of already-created querysets.
         That way you can have a model that groups instances by a foreign key, and then use the gatekeeper on clump.
+
+    The optional using arg picks the database to read from (e.g., a read replica for public requests).
     
     """
     now = datetime.now(pytz.utc)
@@ -142,31 +277,45 @@ def get_appropriate_object_from_model(object_set, is_queryset=False):
         qs = object_set.exclude(publish_status=-1)
     else:
         qs = object_set.objects.exclude(publish_status=-1) 
+    if using is not None:
+        qs = qs.using(using)
 
     # anything that is not available to anyone is ignored
     qs = qs.exclude(live_as_of__gt=now)
     
+    # What this model supports (modification date, default_live...) was worked out when it was registered.
+    info = get_model_info(qs.model)
+
     # Send most-recent live_as_of
-    qs1 = qs.exclude(live_as_of__isnull=True) # For some reason this does NOT WORK
-    qs1 = qs.filter(publish_status=0).order_by('-live_as_of').first()
+    if info is not None and info.effective_live:
+        # One range scan (newest first) on the effective_live_from index.
+        qs1 = object_set if is_queryset else object_set.objects.all()
+        if using is not None:
+            qs1 = qs1.using(using)
+        qs1 = qs1.filter(effective_live_from__gt=ALWAYS_LIVE_FROM, effective_live_from__lte=now)
+        qs1 = qs1.order_by('-effective_live_from', '-pk').first()
+    else:
+        # A draft that was never given a date isn't live (and mustn't win because of where NULLs sort).
+        qs1 = qs.filter(publish_status=0, live_as_of__isnull=False).order_by('-live_as_of', '-pk').first()
     if qs1:
         return qs1
     
+    # (Ties go to the lowest pk - serial_timeline() plays by the same rules.)
+    if info is not None and info.modified_field:
+        ordering = ('-%s' % info.modified_field, 'pk')
+    else:
+        ordering = ('pk',)
+
     # Send the most recently updated permanent on    
-    try:
-        qs2 = qs.filter(publish_status=1).order_by('-date_modified').first()
-    except:
-        qs2 = qs.filter(publish_status=1).first()
+    qs2 = qs.filter(publish_status=1).order_by(*ordering).first()
     if qs2:
         return qs2
         
     # Send the most-recent "default"
-    try:
-        qs3 = qs.filter(default_live=True).order_by('-date_modified').first()
-    except:
-        qs3 = qs.filter(default_live=True).first()
-    if qs3:
-        return qs3
+    if info is None or info.is_serial:
+        qs3 = qs.filter(default_live=True).order_by(*ordering).first()
+        if qs3:
+            return qs3
 
     # Nothing is avaialble - this will likely result in a 404 page being returned.
     return None
@@ -2,6 +2,34 @@ from django.db.models import Q
 import pytz
 from datetime import datetime
 
+from .registry import get_model_info
+from .routers import route_gatekeeper_read
+
+def live_q(now=None):
+    """
+    The public gate as a single Q object: ALWAYS Available, or CONDITIONALLY live with a live_as_of in the past.
+    This is the same rule as view_gatekeeper() (for is_auth = False), in a form that can be OR'd, negated,
+    or used inside a subquery.
+    """
+    if now is None:
+        now = datetime.now(pytz.utc)
+    return Q(publish_status=1) | Q(publish_status=0, live_as_of__lte=now)
+
+def public_gate_q(model, now=None):
+    """
+    The public gate for a model as a Q object, using the cheapest column the model has:
+    gatekeeper_is_live (GatekeeperIsLiveAbstractModel), effective_live_from (GatekeeperEffectiveLiveAbstractModel),
+    or else live_q().
+    """
+    info = get_model_info(model)
+    if info is not None and info.live_flag:
+        return Q(gatekeeper_is_live=True)
+    if now is None:
+        now = datetime.now(pytz.utc)
+    if info is not None and info.effective_live:
+        return Q(effective_live_from__lte=now)
+    return live_q(now)
+
 def view_gatekeeper(qs, is_auth, ignore_standalone=False):
     """
     This is here because there are several places in other views that need to create partial querysets
@@ -13,7 +41,18 @@ def view_gatekeeper(qs, is_auth, ignore_standalone=False):
     through unchecked.
 
     RAD - 2018-Aug-23
+
+    Models with a maintained gatekeeper_is_live column (GatekeeperIsLiveAbstractModel) are filtered on that instead,
+    which doesn't depend on the current time.   Models with an effective_live_from column
+    (GatekeeperEffectiveLiveAbstractModel) are filtered with a single effective_live_from <= now.
+
+    Public (is_auth == False) querysets are sent to the read replica if one is configured (see routers.py).
     """
+    if not is_auth:
+        qs = route_gatekeeper_read(qs, is_auth)
+    info = get_model_info(qs.model)
+    if not is_auth and info is not None and (info.live_flag or info.effective_live):
+        return qs.filter(public_gate_q(qs.model))
     if not is_auth:
         # If you are not logged in, then live_as_of must exist (not None) and must be in the past.
         condition_0 = Q(publish_status__lt=0)
@@ -33,9 +72,6 @@ def object_gatekeeper(obj, is_auth, ignore_standalone=False):
         return False
     if is_auth:
         return True
-    else:
-        try:
-            return obj.available_to_public
-        except:
-            pass
-    return False
+    if get_model_info(obj.__class__) is not None:
+        return obj.available_to_public
+    return bool(getattr(obj, 'available_to_public', False))
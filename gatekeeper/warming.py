@@ -0,0 +1,135 @@
+import pytz
+import threading
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Sum, When
+
+from .cache import (
+    get_gatekeeper_cache, get_model_label, get_timeout_until_transition, make_gatekeeper_key
+)
+from .registry import get_model_info, get_registered_models
+from .utils import (
+    GATE_STATE_ALWAYS, GATE_STATE_DRAFT, GATE_STATE_LIVE, GATE_STATE_OFFLINE, GATE_STATE_SCHEDULED,
+    get_appropriate_object_from_model
+)
+from .view_utils import view_gatekeeper
+
+"""
+Cached, precomputed gatekeeper results --- and the code to compute all of them up front.
+
+    get_serial_winner_pk(model): the pk of the live instance of a serial model (or None)
+    get_live_pks(model): a frozenset of the pks that are live to the public
+    get_state_counts(model): {state: count} for each of the five publish states (see utils.py)
+
+Each is cached until the next object of the model goes live, or an object of the model is saved (see cache.py).
+
+After a deploy, every process starts cold, and the first requests all stampede the database at once.
+warm_gatekeeper_caches() (the gatekeeper_warm management command) computes all of these for every gatekeeper
+model, in parallel, and puts them in the cache before traffic gets switched over.
+"""
+
+def get_gatekeeper_models():
+    """
+    Every installed, concrete model that subclasses GatekeeperAbstractModel (including the serial ones).
+    """
+    return get_registered_models()
+
+def _cached(prefix, model, compute, refresh=False):
+    cache = get_gatekeeper_cache()
+    key = make_gatekeeper_key(prefix, [model])
+    if not refresh:
+        # Values are wrapped in a tuple so a cached None can be told apart from a miss.
+        value = cache.get(key)
+        if value is not None:
+            return value[0]
+    value = compute()
+    cache.set(key, (value,), get_timeout_until_transition([model]))
+    return value
+
+def get_serial_winner_pk(model, refresh=False):
+    def compute():
+        winner = get_appropriate_object_from_model(model)
+        return winner.pk if winner is not None else None
+    return _cached('winner', model, compute, refresh=refresh)
+
+def get_live_pks(model, refresh=False):
+    def compute():
+        return frozenset(view_gatekeeper(model._default_manager.all(), False).values_list('pk', flat=True))
+    return _cached('live_pks', model, compute, refresh=refresh)
+
+def get_state_counts(model, refresh=False):
+    def compute():
+        now = datetime.now(pytz.utc)
+        states = {
+            GATE_STATE_ALWAYS: Q(publish_status__gt=0),
+            GATE_STATE_LIVE: Q(publish_status=0, live_as_of__lte=now),
+            GATE_STATE_SCHEDULED: Q(publish_status=0, live_as_of__gt=now),
+            GATE_STATE_DRAFT: Q(publish_status=0, live_as_of__isnull=True),
+            GATE_STATE_OFFLINE: Q(publish_status__lt=0),
+        }
+        counts = model._default_manager.aggregate(**dict(
+            (state, Sum(Case(When(q, then=1), default=0, output_field=IntegerField())))
+            for state, q in states.items()
+        ))
+        return dict((state, n or 0) for state, n in counts.items())
+    return _cached('state_counts', model, compute, refresh=refresh)
+
+def get_warming_tasks(models=None):
+    """
+    Everything there is to precompute, as (model, function) pairs.
+    """
+    if models is None:
+        models = get_gatekeeper_models()
+    tasks = []
+    for model in models:
+        if get_model_info(model).is_serial:
+            tasks.append((model, get_serial_winner_pk))
+        tasks.append((model, get_live_pks))
+        tasks.append((model, get_state_counts))
+    return tasks
+
+def _run_task(task):
+    model, func = task
+    try:
+        func(model, refresh=True)
+        return (get_model_label(model), func.__name__, None)
+    except Exception as e:
+        return (get_model_label(model), func.__name__, e)
+
+def _run_worker(tasks, results, lock):
+    """
+    One worker thread:  takes tasks until there are none left, then closes its own database connection.
+    """
+    try:
+        while True:
+            with lock:
+                if not tasks:
+                    return
+                index, task = tasks.pop()
+            results[index] = _run_task(task)
+    finally:
+        connection.close()
+
+def warm_gatekeeper_caches(models=None, workers=4):
+    """
+    Precomputes (and caches) every serial winner, live-pk set and state count.
+    Runs up to `workers` at a time, each in its own thread with its own database connection.
+
+    Returns a list of (model label, what, exception or None).
+    """
+    tasks = get_warming_tasks(models)
+    if workers <= 1:
+        return [_run_task(task) for task in tasks]
+    results = [None] * len(tasks)
+    remaining = list(enumerate(tasks))
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=_run_worker, args=(remaining, results, lock))
+        for i in range(min(workers, len(tasks)))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+End-to-end throughput harness for the gatekeeper views.
+
+Seeds a throwaway SQLite database with the test models (see gatekeeper/tests/), then hammers the test site's
+list, keyset list, detail, cached detail and serial (homepage) views through Django's WSGI handler --- the whole
+middleware stack, as anonymous users and as staff --- from N threads at once, and reports:
+
+    req/s, p50/p95/p99 latency (ms), queries per request, and any non-200s
+
+e.g.:
+
+    python loadtest.py                                  # 1000 articles, 8 threads, 500 requests per scenario
+    python loadtest.py --articles 20000 --threads 16 --requests 2000
+    python loadtest.py --scenarios detail serial --users anonymous
+
+It's for comparing changes (caching, indexes, ...) against real request paths, not for absolute numbers:
+SQLite and the local-memory cache behave nothing like production.
+
+It needs Python 3 and Django 2.0 or later (it counts queries with connection.execute_wrapper()), even though
+the app itself still supports Python 2.7 and Django 1.11.
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+
+import django
+from django.conf import settings
+
+SCENARIOS = ('list', 'keyset', 'detail', 'cached-detail', 'serial')
+USERS = ('anonymous', 'staff')
+
+def setup(database):
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'gatekeeper.tests.settings'
+    # Every thread gets its own connection, so the database has to be a file (not :memory:).
+    for alias in settings.DATABASES:
+        settings.DATABASES[alias]['NAME'] = database
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    django.setup()
+    from django.core.management import call_command
+    # The test models aren't in the app's models module, so they have to be imported to get their tables.
+    import gatekeeper.tests.models  # noqa: F401
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+def seed(articles, homepages):
+    """
+    A mix of every publish state, about 70% of it live.   Returns the live article pks.
+    """
+    import pytz
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from gatekeeper.tests.models import GatekeeperArticleTestModel, GatekeeperHomepageTestModel
+
+    now = datetime.now(pytz.utc)
+    rows = []
+    for pk in range(1, articles + 1):
+        kind = pk % 10
+        if kind < 6:
+            values = {'live_as_of': now - timedelta(minutes=pk)}
+        elif kind == 6:
+            values = {'publish_status': 1}
+        elif kind == 7:
+            values = {'live_as_of': now + timedelta(days=1, minutes=pk)}
+        elif kind == 8:
+            values = {}
+        else:
+            values = {'publish_status': -1, 'live_as_of': now - timedelta(minutes=pk)}
+        rows.append(GatekeeperArticleTestModel(pk=pk, title='Article %d' % pk, **values))
+    with transaction.atomic():
+        GatekeeperArticleTestModel.objects.bulk_create(rows, batch_size=500)
+        GatekeeperHomepageTestModel.objects.bulk_create([
+            GatekeeperHomepageTestModel(pk=pk, title='Homepage %d' % pk, live_as_of=now + timedelta(days=pk - 2))
+            for pk in range(1, homepages + 1)
+        ])
+        User.objects.create_superuser('loadtest', 'loadtest@example.com', 'loadtest')
+    return [pk for pk in range(1, articles + 1) if pk % 10 < 7]
+
+def get_staff_cookie():
+    from importlib import import_module
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.auth.models import User
+
+    user = User.objects.get(username='loadtest')
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return '%s=%s' % (settings.SESSION_COOKIE_NAME, session.session_key)
+
+def get_paths(scenario, live_pks):
+    from django.urls import reverse
+    if scenario == 'list':
+        return lambda: reverse('article-list')
+    if scenario == 'keyset':
+        return lambda: reverse('article-keyset-list')
+    if scenario == 'detail':
+        return lambda: reverse('article-detail', args=(random.choice(live_pks),))
+    if scenario == 'cached-detail':
+        return lambda: reverse('article-cached-detail', args=(random.choice(live_pks),))
+    return lambda: reverse('homepage-live')
+
+def make_environ(path, cookie=None):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(b''), 'wsgi.errors': sys.stderr,
+        'wsgi.multiprocess': False, 'wsgi.multithread': True, 'wsgi.run_once': False,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    return environ
+
+def percentile(values, p):
+    """
+    The nearest-rank percentile of a sorted list.
+    """
+    if not values:
+        return 0.0
+    rank = max(int(round(p / 100.0 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+def run_scenario(handler, next_path, requests, threads, cookie=None):
+    """
+    Makes `requests` requests from `threads` threads.   Returns (elapsed seconds, latencies, queries, errors).
+    """
+    from django.db import connections
+
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        counted = [0]
+
+        def count(execute, sql, params, many, context):
+            counted[0] += 1
+            return execute(sql, params, many, context)
+
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            path = next_path()
+            counted[0] = 0
+            statuses = []
+            start = time.time()
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(count))
+                body = handler(make_environ(path, cookie), lambda status, headers: statuses.append(status))
+                b''.join(body)
+                body.close()
+            elapsed = time.time() - start
+            with lock:
+                latencies.append(elapsed)
+                queries.append(counted[0])
+                if not statuses or not statuses[0].startswith('200'):
+                    errors.append((path, statuses[0] if statuses else None))
+        for connection in connections.all():
+            connection.close()
+
+    started = time.time()
+    pool = [threading.Thread(target=worker) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.time() - started, sorted(latencies), queries, errors
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Throughput harness for the gatekeeper views.')
+    parser.add_argument('--articles', type=int, default=1000, help='How many articles to seed (default: 1000).')
+    parser.add_argument('--homepages', type=int, default=10, help='How many homepages to seed (default: 10).')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent threads (default: 8).')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per scenario (default: 500).')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--users', nargs='+', choices=USERS, default=list(USERS))
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='gatekeeper-loadtest-')
+    try:
+        setup(os.path.join(directory, 'loadtest.sqlite3'))
+        from django.core.handlers.wsgi import WSGIHandler
+        live_pks = seed(args.articles, args.homepages)
+        cookies = {'anonymous': None, 'staff': get_staff_cookie()}
+        handler = WSGIHandler()
+
+        print('%d articles (%d live), %d homepages, %d threads, %d requests per scenario\n' % (
+            args.articles, len(live_pks), args.homepages, args.threads, args.requests))
+        print('%-14s %-10s %9s %9s %9s %9s %9s %7s' % (
+            'scenario', 'user', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'errors'))
+        for scenario in args.scenarios:
+            for user in args.users:
+                elapsed, latencies, queries, errors = run_scenario(
+                    handler, get_paths(scenario, live_pks), args.requests, args.threads, cookie=cookies[user]
+                )
+                print('%-14s %-10s %9.1f %9.2f %9.2f %9.2f %9.2f %7d' % (
+                    scenario, user, len(latencies) / elapsed if elapsed else 0.0,
+                    percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000,
+                    percentile(latencies, 99) * 1000, float(sum(queries)) / max(len(queries), 1), len(errors)
+                ))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()